@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+決まった局面で get_move の速さと読みの深さを測るベンチマーク（開発環境用、提出物ではない）
+
+序盤・中盤・戦術的な局面・終盤から選んだ局面で、1局面ごとに新しい AI を作って get_move を1回呼び、
+CPU時間・経過時間・ノード数・ノード毎秒・読み切った深さを測る。
+結果は JSON で出力し、--baseline で保存済みの結果と比べて、遅くなった・浅くなった局面があれば
+終了コード1で失敗する。--instrument で MyAI の探索の統計（search_report）も記録し、
+--profile で指定した局面の1手を cProfile で記録する。
+
+使い方:
+    python benchmark.py [--search-time 秒] [--repeat 回数] [--output 結果.json] [--baseline 基準.json] [--tolerance 割合]
+                        [--instrument] [--profile 局面名] [--profile-output 出力.prof]
+
+    例: python benchmark.py --output baseline.json        # 変更前に基準を保存
+        python benchmark.py --baseline baseline.json      # 変更後に比較
+"""
+
+import argparse
+import datetime
+import io
+import json
+import platform
+import pstats
+import sys
+import time
+
+from dev_tools import board_from_moves, load_module
+
+# 局面名 -> 初期盤面からの手順（"xy" を空白区切り、先手から交互に置く）
+POSITIONS = {
+    # 序盤（定跡は使わずに探索する）
+    "opening_empty": "",
+    "opening_ply2": "33 02",
+    "opening_ply4": "11 23 11 11",
+    # 中盤
+    "middlegame_ply12": "33 02 03 13 30 31 03 22 32 21 22 21",
+    "middlegame_ply20": "11 23 11 11 01 33 00 03 13 23 10 12 30 20 21 31 21 23 23 13",
+    "middlegame_ply28": "11 23 11 11 01 33 00 03 13 23 10 12 30 20 21 31 21 23 23 13 13 13 21 21 03 30 03 03",
+    # 戦術的な局面（リーチの連続で勝ち切れる・探索で勝敗が決まる・保留中の脅威が多い）
+    "tactical_threat_win": "00 02 30 10 33 31 31 12 13 21 22 11 01 12 11 21 21 11 30 12 12 10 30 30 33 10 10 13 13 22",
+    "tactical_defend": "00 02 30 10 33 31 31 12 13 21 22 11 01 12 11 21 21 11 30 12 12 10 30 30 33 10 10 13 13",
+    "tactical_mate": "11 23 11 11 01 33 00 03 13 23 10 12 30 20 21 31 21 23 23 13 13 13 21 21 03 30 03 03 01 31 "
+                     "00 01 33 30 30 10 10 11 10 01 12",
+    "tactical_pending_threats": "33 02 03 13 30 31 03 22 32 21 22 21 03 03 21 20 23 22 12 01 11 32 12 12 33 11 11 01 "
+                                "31 01 01 00 32 10 30 31 20 00 11 12",
+    # 終盤（終盤ソルバーで読み切る）
+    "endgame_empty20": "33 02 03 13 30 31 03 22 32 21 22 21 03 03 21 20 23 22 12 01 11 32 12 12 33 11 11 01 "
+                       "31 01 01 00 32 10 30 31 20 00 11 12 13 23 21 31",
+    "endgame_empty18": "11 23 11 11 01 33 00 03 13 23 10 12 30 20 21 31 21 23 23 13 13 13 21 21 03 30 03 03 01 31 "
+                       "00 01 33 30 30 10 10 11 10 01 12 12 12 32 22 22",
+    "endgame_empty12": "11 23 11 11 01 33 00 03 13 23 10 12 30 20 21 31 21 23 23 13 13 13 21 21 03 30 03 03 01 31 "
+                       "00 01 33 30 30 10 10 11 10 01 12 12 12 32 22 22 22 32 32 32 20 20",
+}
+
+# 比較で回帰とみなす指標（ノード毎秒は割合、深さは絶対値で判定する）
+NPS_KEY = "nodes_per_second"
+DEPTH_KEY = "depth"
+MIN_COMPARE_SECONDS = 0.2  # これより短く終わる局面はノード毎秒がぶれるので個別には比べない
+DEPTH_SLACK = 1  # 時間の境目で1段浅くなるのは揺らぎとみなし、これを超えて浅くなったら回帰とする
+
+
+def move_reason(ai) -> str:
+    """AI がどの段階で手を決めたか"""
+    if getattr(ai, "_book_move", False):
+        return "book"
+    if getattr(ai, "_threat_win_move", False):
+        return "threat"
+    if getattr(ai, "_proof_result", None):
+        return "proof"
+    if getattr(ai, "_endgame_result", None) is not None:
+        return "endgame"
+    if getattr(ai, "_search_depth", 0) > 0:
+        return "search"
+    return "immediate"
+
+
+def new_ai(module, search_time: float, instrument: bool, profile: bool = False):
+    """定跡を使わない AI を作る（計測を有効にできない古い main.py なら計測なしで作る）"""
+    ai = module.MyAI(search_time=search_time, use_opening_book=False)
+    if (instrument or profile) and hasattr(ai, "enable_instrumentation"):
+        ai.enable_instrumentation(timing=instrument, profile=profile)
+    return ai
+
+
+def measure(module, name: str, moves: str, search_time: float, instrument: bool = False):
+    """1局面で get_move を1回呼び、指標を返す"""
+    board, player, last_move = board_from_moves(moves)
+    ai = new_ai(module, search_time, instrument)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    x, y = ai.get_move(board, player, last_move)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    nodes = getattr(ai, "_nodes", 0)
+    result = {
+        "stones": len(moves.split()),
+        "player": player,
+        "move": [x, y],
+        "reason": move_reason(ai),
+        "cpu_seconds": round(cpu, 4),
+        "wall_seconds": round(wall, 4),
+        "nodes": nodes,
+        NPS_KEY: round(nodes / cpu) if cpu > 0 else 0,
+        DEPTH_KEY: getattr(ai, "_search_depth", 0),
+        "score": getattr(ai, "_search_score", 0),
+    }
+    if instrument and hasattr(ai, "search_report"):
+        result["search_report"] = ai.search_report()
+    return result
+
+
+def report_summary(report) -> str:
+    """search_report を1行にまとめた文字列"""
+    times = report["time"]
+    total = sum(times.values()) or 1.0
+    shares = " / ".join(f"{category} {seconds / total * 100:.0f}%" for category, seconds in times.items())
+    return (f"置換表ヒット率 {report['tt']['hit_rate'] * 100:.1f}% (衝突 {report['tt']['collisions']})  "
+            f"初手カット率 {report['first_move_cutoff_rate'] * 100:.1f}%  時間 {shares}")
+
+
+def profile_position(module, name: str, search_time: float, output=None) -> None:
+    """1局面の get_move を cProfile で記録し、自己時間の多い関数を表示する（output があれば書き出す）"""
+    board, player, last_move = board_from_moves(POSITIONS[name])
+    ai = new_ai(module, search_time, instrument=False, profile=True)
+    if not hasattr(ai, "enable_instrumentation"):
+        print(f"{name}: この AI は計測に対応していません")
+        return
+    ai.get_move(board, player, last_move)
+    stream = io.StringIO()
+    pstats.Stats(ai.last_profile, stream=stream).sort_stats("tottime").print_stats(20)
+    print(f"\n# {name} の cProfile（自己時間順）")
+    print(stream.getvalue())
+    if output:
+        ai.last_profile.dump_stats(output)
+        print(f"プロファイルを {output} に書き出しました")
+
+
+def run(path: str, search_time: float, names, repeat: int, instrument: bool = False):
+    """全ての局面を測り、JSON に書き出す形の結果を返す（各局面 repeat 回のうちノード毎秒が最大の回を採る）"""
+    module = load_module(path)
+    results = {}
+    for name in names:
+        runs = [measure(module, name, POSITIONS[name], search_time, instrument) for _ in range(max(1, repeat))]
+        result = max(runs, key=lambda run_result: run_result[NPS_KEY])
+        result["runs"] = len(runs)
+        results[name] = result
+        print(f"  {name:26s} {result['reason']:9s} 深さ {result[DEPTH_KEY]:2d}  ノード {result['nodes']:7d}  "
+              f"{result[NPS_KEY]:6d} ノード/秒  CPU {result['cpu_seconds']:.2f}秒", flush=True)
+        if result.get("search_report"):
+            print(f"  {'':26s} {report_summary(result['search_report'])}", flush=True)
+    total_nodes = sum(result["nodes"] for result in results.values())
+    total_cpu = sum(result["cpu_seconds"] for result in results.values())
+    return {
+        "meta": {
+            "ai": path,
+            "search_time": search_time,
+            "repeat": repeat,
+            "instrument": instrument,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "positions": results,
+        "summary": {
+            "nodes": total_nodes,
+            "cpu_seconds": round(total_cpu, 4),
+            NPS_KEY: round(total_nodes / total_cpu) if total_cpu > 0 else 0,
+        },
+    }
+
+
+def compare(current, baseline, tolerance: float):
+    """基準の結果と比べ、回帰した項目のメッセージ一覧を返す"""
+    regressions = []
+    print(f"\n# 基準との比較（ノード毎秒の許容低下 {tolerance * 100:.0f}%）")
+    for name, result in current["positions"].items():
+        base = baseline["positions"].get(name)
+        if base is None:
+            continue
+        nps_ratio = result[NPS_KEY] / base[NPS_KEY] if base[NPS_KEY] else 1.0
+        print(f"  {name:26s} ノード/秒 {base[NPS_KEY]:6d} -> {result[NPS_KEY]:6d} ({nps_ratio * 100:5.1f}%)  "
+              f"深さ {base[DEPTH_KEY]:2d} -> {result[DEPTH_KEY]:2d}")
+        if base["cpu_seconds"] >= MIN_COMPARE_SECONDS and nps_ratio < 1.0 - tolerance:
+            regressions.append(f"{name}: ノード/秒が {base[NPS_KEY]} から {result[NPS_KEY]} に低下")
+        if result["reason"] == base["reason"] == "search" and result[DEPTH_KEY] < base[DEPTH_KEY] - DEPTH_SLACK:
+            regressions.append(f"{name}: 読み切った深さが {base[DEPTH_KEY]} から {result[DEPTH_KEY]} に低下")
+    base_nps = baseline["summary"][NPS_KEY]
+    if base_nps and current["summary"][NPS_KEY] < base_nps * (1.0 - tolerance):
+        regressions.append(f"全体: ノード/秒が {base_nps} から {current['summary'][NPS_KEY]} に低下")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="決まった局面で get_move を測る")
+    parser.add_argument("--ai", default="main.py", help="AIのファイル")
+    parser.add_argument("--search-time", type=float, default=1.0, help="1手あたりの探索CPU秒数")
+    parser.add_argument("--positions", nargs="*", default=None, help="測る局面名（省略時は全て）")
+    parser.add_argument("--repeat", type=int, default=3, help="各局面を測る回数（ノード毎秒が最大の回を採る）")
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    parser.add_argument("--baseline", help="比べる基準の JSON ファイル")
+    parser.add_argument("--instrument", action="store_true",
+                        help="探索の統計も記録する（計測の分だけ遅くなるため、基準との比較は計測なし同士で行う）")
+    parser.add_argument("--profile", metavar="局面名", help="この局面の1手を cProfile で記録して表示する")
+    parser.add_argument("--profile-output", help="--profile の記録を書き出すファイル（pstats 形式）")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="回帰とみなすノード毎秒の低下の割合（同じコードでも測るたびに2割ほどぶれる）")
+    args = parser.parse_args()
+
+    if args.profile:
+        profile_position(load_module(args.ai), args.profile, args.search_time, args.profile_output)
+        return
+
+    names = args.positions or list(POSITIONS)
+    print(f"# {args.ai}: {len(names)} 局面, search_time={args.search_time}")
+    current = run(args.ai, args.search_time, names, args.repeat, args.instrument)
+    print(f"  合計 ノード {current['summary']['nodes']}  {current['summary'][NPS_KEY]} ノード/秒")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"結果を {args.output} に書き出しました")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ 回帰を検出しました:")
+            for message in regressions:
+                print(f"  - {message}")
+            sys.exit(1)
+        print("\n✅ 回帰はありません")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+main.py に埋め込む定跡表（_OPENING_BOOK）を生成するスクリプト（開発環境用、提出物ではない）
+
+序盤の各局面を本番より長い時間で探索し、最善手を標準形（対称変換で辞書順最小の形）で記録する。
+定跡を使う側の手番の局面だけを対象とし、相手の手はすべて、自分の手は定跡の手だけを展開する。
+
+使い方:
+    python build_opening_book.py [--seconds 1局面あたりの探索秒数] [--max-stones 最大石数] [--write]
+"""
+
+import argparse
+import time
+
+from dev_tools import load_module
+from local_driver import create_board, place_disk
+
+
+def copy_board(board):
+    """盤面を複製"""
+    return [[row[:] for row in layer] for layer in board]
+
+
+def children(board):
+    """次の手番が置ける全ての手を置いた盤面を列挙"""
+    stones = sum(1 for layer in board for row in layer for value in row if value)
+    player = 1 if stones % 2 == 0 else 2
+    for y in range(4):
+        for x in range(4):
+            if board[3][y][x] == 0:
+                child = copy_board(board)
+                place_disk(child, x, y, player)
+                yield child
+
+
+def build_book(module, seconds: float, max_stones: int):
+    """定跡表 {標準形のキー: 標準形での列番号} を生成"""
+    book = {}
+    frontier = {}  # 標準形のキー -> 盤面（定跡を使う側の手番）
+    probe = module.MyAI(use_opening_book=False)
+
+    def add(target, board):
+        probe._load_board(board)
+        key, _ = probe._opening_book_key()
+        target.setdefault(key, board)
+
+    add(frontier, create_board())  # 先手の初手
+    for board in children(create_board()):
+        add(frontier, board)  # 後手の初手
+
+    for stones in range(max_stones + 1):
+        level = {key: board for key, board in frontier.items() if len(key) - 1 == stones}
+        start = time.time()
+        for key, board in sorted(level.items()):
+            player = 1 if stones % 2 == 0 else 2
+            ai = module.MyAI(search_time=seconds, use_opening_book=False)
+            # 序盤の探索時間の短縮（_allocate_time）を通さず、指定した秒数をそのまま使う
+            ai._allocate_time = lambda: seconds
+            x, y = ai.find_best_move(board, player)
+            ai._load_board(board)
+            _, symmetry = ai._opening_book_key()
+            book[key] = module._SYMMETRY_COLS[symmetry][x + 4 * y]
+
+            # 定跡の手を指した後、相手の全ての応手を次の対象にする
+            if stones + 2 <= max_stones:
+                after = copy_board(board)
+                place_disk(after, x, y, player)
+                if not ai.check_win(after, x, y, ai.get_height(board, x, y), player):
+                    for child in children(after):
+                        add(frontier, child)
+        print(f"# 石数 {stones}: {len(level)} 局面 ({time.time() - start:.1f}秒)")
+    return book
+
+
+def format_book(book) -> str:
+    """main.py に貼り付ける辞書リテラルの中身を生成"""
+    items = [f'"{key}": {col},' for key, col in sorted(book.items(), key=lambda item: (len(item[0]), item[0]))]
+    lines = []
+    for i in range(0, len(items), 6):
+        lines.append("    " + " ".join(items[i:i + 6]))
+    return "\n".join(lines)
+
+
+def write_book(path: str, body: str) -> None:
+    """main.py の _OPENING_BOOK の中身を置き換える"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    start = source.index("_OPENING_BOOK = {\n") + len("_OPENING_BOOK = {\n")
+    end = source.index("\n}\n", start - 2)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source[:start] + body + source[end:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="定跡表を生成")
+    parser.add_argument("--seconds", type=float, default=3.0, help="1局面あたりの探索CPU秒数")
+    parser.add_argument("--max-stones", type=int, default=5, help="定跡に含める局面の最大石数")
+    parser.add_argument("--path", default="main.py", help="AIのファイル")
+    parser.add_argument("--write", action="store_true", help="生成した表を main.py に書き込む")
+    args = parser.parse_args()
+
+    module = load_module(args.path)
+    book = build_book(module, args.seconds, args.max_stones)
+    body = format_book(book)
+    print(f"# {len(book)} 局面")
+    if args.write:
+        write_book(args.path, body)
+    else:
+        print(body)
+
+
+if __name__ == "__main__":
+    main()
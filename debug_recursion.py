@@ -44,7 +44,7 @@ def debug_evaluate_position(ai, board, x, y, z, player, depth=0, indent=""):
     print(f"{indent}  decay_rate={decay_rate:.3f}")
     
     # 自分の報酬を計算
-    my_reward = ai.calculate_reward(board, x, y, z, player)
+    my_reward = ai.evaluate_position(board, x, y, z, player)
     print(f"{indent}  → 自分の報酬: {my_reward}")
     
     # 相手の最大報酬を計算（常に再帰）
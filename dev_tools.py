@@ -0,0 +1,36 @@
+"""
+開発用スクリプト（tournament.py・benchmark.py・build_opening_book.py）の共通部品（開発環境用、提出物ではない）
+
+import すると、main.py が本番用に import する framework を local_driver で代用する。
+"""
+
+import importlib.util
+import sys
+
+import local_driver
+from local_driver import create_board, place_disk
+
+# main.py は本番用に framework から import するため、ローカルでは local_driver で代用する
+sys.modules.setdefault("framework", local_driver)
+
+
+def load_module(path: str = "main.py"):
+    """main.py をモジュールとして読み込む（local_driver.load_ai と同じ方法）"""
+    spec = importlib.util.spec_from_file_location("student_ai", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def board_from_moves(moves: str):
+    """手順（"xy" を空白区切り、先手から交互に置く）から (盤面, 手番, 直前の手) を作る"""
+    board = create_board()
+    player = 1
+    last_move = (0, 0, 0)
+    for move in moves.split():
+        x, y = int(move[0]), int(move[1])
+        z = next(z for z in range(4) if board[z][y][x] == 0)
+        place_disk(board, x, y, player)
+        last_move = (x, y, z)
+        player = 3 - player
+    return board, player, last_move
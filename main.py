@@ -1,13 +1,493 @@
-from typing import List, Tuple
+import random
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
 # from local_driver import Alg3D, Board # ローカル検証用
 from framework import Alg3D, Board # 本番用
 
+# === ビットボード用の定数 ===
+# セル番号 = x + 4*y + 16*z、列番号 = x + 4*y
+# プレイヤーごとの64bit整数で、ビット (1 << セル番号) が石の有無を表す
+
+# 13方向の直線
+_DIRECTIONS = (
+    (1, 0, 0),   # x軸方向
+    (0, 1, 0),   # y軸方向
+    (0, 0, 1),   # z軸方向
+    (1, 1, 0),   # xy対角線
+    (1, 0, 1),   # xz対角線
+    (0, 1, 1),   # yz対角線
+    (1, 1, 1),   # xyz対角線
+    (1, -1, 0),  # xy逆対角線
+    (1, 0, -1),  # xz逆対角線
+    (0, 1, -1),  # yz逆対角線
+    (1, -1, -1), # xyz逆対角線
+    (1, 1, -1),  # xy正、z負対角線
+    (1, -1, 1),  # xy負、z正対角線
+)
+_DIRECTION_INDEX = {direction: i for i, direction in enumerate(_DIRECTIONS)}
+
+
+def _build_cell_rays():
+    """各セル・各方向について (正方向のセル列, 負方向のセル列, 両方向のマスク) を事前計算"""
+    all_rays = []
+    for cell in range(64):
+        x, y, z = cell & 3, (cell >> 2) & 3, cell >> 4
+        cell_rays = []
+        for dx, dy, dz in _DIRECTIONS:
+            sides = []
+            for sign in (1, -1):
+                side = []
+                nx, ny, nz = x + sign * dx, y + sign * dy, z + sign * dz
+                while 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
+                    side.append(nx + 4 * ny + 16 * nz)
+                    nx, ny, nz = nx + sign * dx, ny + sign * dy, nz + sign * dz
+                sides.append(tuple(side))
+            mask = 0
+            for other in sides[0] + sides[1]:
+                mask |= 1 << other
+            cell_rays.append((sides[0], sides[1], mask))
+        all_rays.append(tuple(cell_rays))
+    return tuple(all_rays)
+
+
+_CELL_RAYS = _build_cell_rays()
+
+
+def _build_lines():
+    """4つ並びの勝利ライン（全76本）を (方向, 4セル) の組で列挙（方向順）"""
+    lines = []
+    for dx, dy, dz in _DIRECTIONS:
+        for start in range(64):
+            x, y, z = start & 3, (start >> 2) & 3, start >> 4
+            ex, ey, ez = x + 3 * dx, y + 3 * dy, z + 3 * dz
+            if 0 <= ex < 4 and 0 <= ey < 4 and 0 <= ez < 4:
+                cells = tuple((x + i * dx) + 4 * (y + i * dy) + 16 * (z + i * dz) for i in range(4))
+                lines.append(((dx, dy, dz), cells))
+    return tuple(lines)
+
+
+# 勝利ラインの表（インポート時に一度だけ構築）
+_LINES = _build_lines()
+_LINE_DIRECTIONS = tuple(direction for direction, _ in _LINES)
+_LINE_CELLS = tuple(cells for _, cells in _LINES)
+_LINE_MASKS = tuple(sum(1 << c for c in cells) for cells in _LINE_CELLS)
+_NUM_LINES = len(_LINES)  # 76
+
+# セル番号 -> そのセルを通る勝利ラインの番号（方向順）
+_CELL_LINES = tuple(
+    tuple(line for line in range(_NUM_LINES) if cell in _LINE_CELLS[line])
+    for cell in range(64)
+)
+_CELL_LINE_COUNTS = tuple(len(lines) for lines in _CELL_LINES)  # セル番号 -> 通る勝利ラインの数
+
+# 列の走査順（元の実装と同じく x が外側、y が内側）
+_SCAN_ORDER = tuple(x + 4 * y for x in range(4) for y in range(4))
+
+
+# === 探索用の定数 ===
+_WIN_SCORE = 100000  # 勝ちの評価値（手数が短いほど大きくする）
+_MATE_THRESHOLD = _WIN_SCORE - 100  # これ以上なら勝敗が確定した評価値
+_INFINITY = 1000000
+_LINE_WEIGHTS = (0, 1, 10, 100, 1000)  # 片方の石だけのラインの、石数ごとの評価値（4個は勝ちの手を試す間だけ現れる）
+_TIME_CHECK_INTERVAL = 1024  # 何ノードごとに経過時間を確認するか（2のべき乗）
+_UNLIMITED_NODES = 1 << 62  # ノード数の上限を設けない探索で使う上限
+# 手番側の合法手の分類（_classify_moves の結果）
+_MOVES_NORMAL = 0  # 通常の局面
+_MOVES_FORCED = 1  # 相手のリーチを塞ぐ手しか指せない
+_MOVES_WIN = 2  # 置けばすぐ勝てる列がある
+_MOVES_LOSS = 3  # 相手のリーチが2つ以上ある、またはどこに置いても相手の脅威の下（負け確定）
+_MOVES_DRAW = 4  # 盤面が埋まった（引き分け）
+_CPU_TIME_LIMIT = 3.0  # 本番ルールの1手あたりのCPU時間の上限（超えると左上に置かれる）
+_TIME_SAFETY_MARGIN = 0.4  # 上限に対して必ず残す余裕（時間確認の間隔や盤面変換の分）
+_OPENING_STONES = 8  # 石がこの数未満の序盤は探索時間を減らす
+_OPENING_TIME_RATIO = 0.5  # 序盤に使う探索時間の割合
+_CRITICAL_TIME_RATIO = 0.25  # 盤上の脅威マス1つあたりに探索時間を増やす割合
+_MAX_CRITICAL_TIME_RATIO = 1.5  # 緊迫した局面で探索時間を増やす割合の上限
+_MAX_PLY = 64  # 探索の最大手数（キラー手の表・手数ごとの手の並びの大きさ）
+_ORDER_FIRST_KEY = 1 << 40  # 並べ替えの点数の基準（置換表の手・キラー手は 0〜2、他の手はこれから履歴の点数を引く）
+_ENDGAME_EMPTY_CELLS = 20  # 空きマスがこの数以下なら終盤ソルバーで読み切る
+_ENDGAME_NODE_BUDGET = 200000  # 終盤ソルバーのノード数の上限（超えたら通常の探索に戻る）
+_ENDGAME_TIME_RATIO = 0.5  # 残りの探索時間のうち終盤ソルバーに使う割合
+_SOLVED_TABLE_SIZE = 1 << 16  # 終盤ソルバー専用の置換表のエントリ数（2のべき乗）
+_SOLVED_TABLE_MASK = _SOLVED_TABLE_SIZE - 1
+_PARITY_THREAT_SCORE = 30  # 手番の順で自分が埋められる段にある、列で一番下の脅威1つあたりの評価値
+_ZUGZWANG_SCORE = 150  # 最後に相手が脅威の下に置かされる（ツークツワンクで勝てる）局面の評価値
+_THREAT_SEARCH_DEPTH = 8  # 脅威探索で読む攻め手の手数（相手の応手を含めると倍の手数）
+_THREAT_SEARCH_TIME_RATIO = 0.2  # 探索時間のうち脅威探索に使う割合
+# 後ろの方に並んだ静かな手（脅威を作らない・キラー手でない）を浅く読む深さ（0で無効）
+# 同じ思考時間の対戦で強くならなかったため既定では無効（tournament.py で設定を変えて比べる）
+_LMR_REDUCTION = 0
+_LMR_MIN_DEPTH = 4  # 残りの深さがこれ以上の局面でだけ浅く読む
+_LMR_MIN_MOVES = 5  # 並べ替えでこの数より後ろの手だけを浅く読む
+# リーチを塞ぐしかない局面を深く読む深さ（0で無効、リーチを作る手とその応手を合わせて1手分と数える）
+# 深さ0以下でも塞ぐ手だけは読み続けるため効果が薄く、ノード数が増える分だけ弱くなったので既定では無効
+_THREAT_EXTENSION = 0
+_ASPIRATION_WINDOW = 25  # 反復深化で前の深さの評価値の前後に取る探索窓の幅
+_ASPIRATION_GROWTH = 4  # 窓から外れた側の幅を再探索のたびに何倍に広げるか
+_PROOF_MIN_THREATS = 4  # 盤上の脅威マスがこの数以上の緊迫した局面で証明数探索を試す
+_PROOF_NODE_BUDGET = 20000  # 証明数探索のノード数の上限（超えたら通常の探索に戻る）
+_PROOF_TIME_RATIO = 0.15  # 残りの探索時間のうち証明数探索に使う割合
+_PROOF_TABLE_SIZE = 1 << 16  # 証明数探索の表のエントリ数（2のべき乗、1エントリ16バイトで約1MB）
+_PROOF_TABLE_MASK = _PROOF_TABLE_SIZE - 1
+_PROOF_INFINITY = 1 << 30  # 証明数・反証数の無限大（符号なし32ビットの配列に収まる大きさ）
+
+
+def _build_line_score_deltas():
+    """[プレイヤー][そのプレイヤーの石数][相手の石数] -> 石を1個足した時のラインの評価値の変化（プレイヤー1視点）"""
+    def value(count1, count2):
+        if not count2:
+            return _LINE_WEIGHTS[count1]
+        if not count1:
+            return -_LINE_WEIGHTS[count2]
+        return 0  # 両方の石があるラインは誰も4つ並べられない
+    
+    deltas = [None]
+    for player in (1, 2):
+        table = []
+        for own in range(4):
+            row = []
+            for opponent in range(4 - own):  # 石を置く空きマスがあるので合計3個以下
+                if player == 1:
+                    row.append(value(own + 1, opponent) - value(own, opponent))
+                else:
+                    row.append(value(opponent, own + 1) - value(opponent, own))
+            table.append(tuple(row))
+        deltas.append(tuple(table))
+    return tuple(deltas)
+
+
+_LINE_SCORE_DELTAS = _build_line_score_deltas()
+
+
+# === Zobrist ハッシュと置換表 ===
+# 乱数は固定シードで生成し、同じ局面には常に同じキーが対応するようにする
+_ZOBRIST_RANDOM = random.Random(20240917)
+_ZOBRIST = (
+    None,
+    tuple(_ZOBRIST_RANDOM.getrandbits(64) for _ in range(64)),  # プレイヤー1の石
+    tuple(_ZOBRIST_RANDOM.getrandbits(64) for _ in range(64)),  # プレイヤー2の石
+)
+_ZOBRIST_SIDE = (0, 0, _ZOBRIST_RANDOM.getrandbits(64))  # 手番（プレイヤー2の番なら XOR する）
+
+
+def _build_symmetry_columns():
+    """4x4 の列配置の回転・反転（8通り）を列番号の写像として列挙（先頭は恒等変換）"""
+    mappings = []
+    for swap in (False, True):
+        for flip_x in (False, True):
+            for flip_y in (False, True):
+                mapping = []
+                for col in range(16):
+                    x, y = col & 3, col >> 2
+                    if swap:
+                        x, y = y, x
+                    if flip_x:
+                        x = 3 - x
+                    if flip_y:
+                        y = 3 - y
+                    mapping.append(x + 4 * y)
+                mappings.append(tuple(mapping))
+    return tuple(mappings)
+
+
+# 重力は z 方向にしか働かないため、列配置の回転・反転だけが勝利ラインと合法手を保つ対称性になる
+_SYMMETRY_COLS = _build_symmetry_columns()
+_NUM_SYMMETRIES = len(_SYMMETRY_COLS)  # 8
+_SYMMETRY_INVERSE_COLS = tuple(
+    tuple(mapping.index(col) for col in range(16)) for mapping in _SYMMETRY_COLS
+)
+_SYMMETRY_CELLS = tuple(
+    tuple(mapping[cell & 15] + (cell & 48) for cell in range(64)) for mapping in _SYMMETRY_COLS
+)
+# [プレイヤー][セル] -> 各対称変換後のセルの Zobrist キー（8個）
+_ZOBRIST_SYMMETRIC = (
+    None,
+    tuple(tuple(_ZOBRIST[1][cells[cell]] for cells in _SYMMETRY_CELLS) for cell in range(64)),
+    tuple(tuple(_ZOBRIST[2][cells[cell]] for cells in _SYMMETRY_CELLS) for cell in range(64)),
+)
+
+_COLUMN_BITS = 0x0001000100010001  # 列0の4マス（z=0..3）のビット
+_BOARD_BITS = (1 << 64) - 1
+# 盤面が埋まるまで打ち合うと、先手は z が偶数（1・3段目）、後手は z が奇数（2・4段目）のマスを埋めることになる
+_PARITY_CELLS = (0, 0x0000FFFF0000FFFF, 0xFFFF0000FFFF0000)
+
+
+def _transform_bits(bits: int, mapping: Tuple[int, ...]) -> int:
+    """石のビット集合を列番号の写像 mapping で対称変換する"""
+    transformed = 0
+    for col in range(16):
+        column = (bits >> col) & _COLUMN_BITS
+        if column:
+            transformed |= column << mapping[col]
+    return transformed
+
+
+_TT_SIZE = 1 << 18  # 置換表のエントリ数（2のべき乗、1エントリは数十バイト）
+_TT_MASK = _TT_SIZE - 1
+# 全ての列をまとめて評価した時の内訳の名前（評価の1.〜6.の特徴量と、石を置いた後の相手の最大点数）
+_ROOT_FEATURES = ("lines", "own_stones", "position_bonus", "double_reach", "opponent_double_reach",
+                  "opponent_wins", "opponent_max_score")
+
+# 置換表エントリの評価値の種類
+_TT_EXACT = 0  # 正確な値
+_TT_LOWER = 1  # 下限（β カットした）
+_TT_UPPER = 2  # 上限（α を超えなかった）
+
+
+# === 出力レベル ===
+VERBOSITY_QUIET = 0  # 提出用: 可視化・診断出力を一切行わない
+VERBOSITY_DEBUG = 1  # ローカル分析用: 盤面・各マスの点数・選択理由などを表示
+
+
+# === 探索の計測（開発用、instrument=True のときだけメソッドを差し替える） ===
+# 計測するメソッド名 -> 時間を集計する分類
+_INSTRUMENTED_METHODS = (
+    ("_static_evaluation", "evaluation"),
+    ("_evaluate_cell", "evaluation"),
+    ("_classify_moves", "move_generation"),
+    ("_order_moves", "move_generation"),
+    ("_make_move", "make_unmake"),
+    ("_unmake_move", "make_unmake"),
+    ("_find_winning_column", "win_checks"),
+    ("_winning_columns", "win_checks"),
+    ("_is_winning_cell", "win_checks"),
+)
+_INSTRUMENTED_CATEGORIES = ("evaluation", "move_generation", "make_unmake", "win_checks")
+_TT_STAT_KEYS = ("probes", "hits", "collisions", "stores", "replacements")
+
+
+# === 定跡 ===
+# 開発環境で build_opening_book.py により深く探索して生成した序盤の最善手
+# キー: 標準形の局面（プレイヤー1の石, "/", プレイヤー2の石 をセル番号の文字で昇順に並べたもの）
+# 値: 標準形での列番号
+_BOOK_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_"
+_OPENING_BOOK = {
+    "/": 0, "0/": 12, "1/": 0, "5/": 15, "0/1": 12, "0/2": 12,
+    "0/3": 12, "0/5": 5, "0/6": 15, "0/7": 3, "0/A": 10, "0/B": 3,
+    "0/F": 12, "0/G": 15, "01/3": 15, "01/C": 3, "02/3": 12, "02/C": 3,
+    "03/C": 15, "05/3": 15, "05/F": 5, "0G/3": 12, "12/0": 1, "14/0": 0,
+    "15/0": 5, "15/F": 12, "1G/0": 12, "1H/0": 12, "24/0": 15, "24/3": 2,
+    "25/3": 15, "25/F": 3, "28/3": 12, "34/0": 0, "34/F": 12, "35/0": 5,
+    "35/F": 12, "38/0": 15, "38/C": 15, "38/F": 12, "39/0": 12, "3C/0": 15,
+    "3G/0": 15, "46/0": 6, "46/C": 6, "47/0": 3, "56/C": 7, "5L/F": 5,
+    "68/C": 15, "69/3": 6, "78/3": 0, "AG/0": 10, "03/14": 15, "03/18": 15,
+    "03/1C": 15, "03/24": 3, "03/28": 15, "03/2C": 15, "03/45": 5, "03/46": 6,
+    "03/47": 0, "03/48": 4, "03/49": 9, "03/4C": 0, "03/4D": 15, "03/4G": 15,
+    "03/4K": 15, "03/58": 1, "03/5C": 1, "03/68": 2, "03/6C": 2, "03/78": 1,
+    "03/79": 9, "03/7C": 1, "03/7D": 12, "03/7G": 12, "03/89": 15, "03/8A": 11,
+    "03/8B": 0, "03/8C": 15, "03/8D": 15, "03/8G": 15, "03/8O": 8, "03/9C": 1,
+    "03/AC": 2, "03/BC": 1, "03/BD": 12, "03/BG": 12, "03/CD": 15, "03/CE": 15,
+    "03/CF": 1, "03/CG": 15, "03/CS": 15, "03/FG": 2, "0L/15": 4, "0L/25": 4,
+    "0L/35": 1, "0L/56": 4, "0L/57": 4, "0L/5A": 10, "0L/5B": 1, "0L/5F": 4,
+    "0L/5G": 4, "0L/5b": 4, "3C/05": 15, "3C/0A": 15, "3C/0J": 6, "3C/15": 15,
+    "3C/1A": 15, "3C/1J": 15, "3C/25": 15, "3C/2J": 6, "3C/4J": 15, "3C/56": 5,
+    "3C/57": 0, "3C/5A": 12, "3C/5J": 15, "3C/5L": 5, "3C/6J": 6, "3C/8J": 15,
+    "3C/9J": 9, "3C/JS": 9, "3C/JZ": 15, "FL/05": 3, "FL/15": 15, "FL/25": 3,
+    "FL/35": 12, "FL/56": 3, "FL/57": 5, "FL/5A": 10, "FL/5B": 0, "FL/5V": 0,
+    "FL/5b": 0, "012/3C": 15, "012/3F": 15, "012/3I": 15, "013/CF": 2, "014/3C": 15,
+    "014/3F": 12, "015/3C": 15, "015/3F": 12, "015/CF": 13, "015/FL": 3, "01G/3C": 15,
+    "01G/3F": 12, "01H/3C": 15, "01H/3F": 7, "024/3C": 6, "024/3I": 3, "024/CF": 3,
+    "025/3C": 15, "025/3F": 12, "025/CF": 3, "025/FL": 3, "028/3C": 15, "02G/3C": 6,
+    "034/CF": 15, "035/CF": 13, "035/FL": 1, "038/CF": 12, "039/CF": 13, "039/CP": 15,
+    "03G/CF": 3, "046/3C": 6, "046/3M": 7, "046/CF": 7, "046/CM": 7, "047/3C": 6,
+    "047/3J": 12, "047/CF": 6, "056/3F": 7, "056/3M": 15, "056/4F": 5, "056/7C": 6,
+    "056/CF": 7, "056/FL": 3, "05G/3C": 15, "05G/3F": 7, "05G/FL": 12, "05L/3F": 7,
+    "05L/Fb": 8, "05b/FL": 12, "068/3C": 15, "068/3M": 15, "068/CF": 6, "069/3F": 3,
+    "069/3M": 9, "06G/3C": 15, "06G/3M": 7, "06G/CF": 6, "078/3C": 15, "078/3J": 12,
+    "078/CF": 12, "079/3F": 9, "079/3J": 4, "079/CF": 13, "079/CP": 15, "07C/3F": 4,
+    "07C/3J": 8, "07G/3C": 6, "07G/3J": 7, "07G/CF": 0, "08B/3C": 9, "08B/CF": 13,
+    "0AG/3C": 15, "0AG/3F": 11, "0BG/3C": 15, "0BG/CF": 13, "0FG/3C": 9, "0GJ/3C": 15,
+    "0GW/3C": 0, "0JS/3C": 9, "124/0F": 0, "124/0G": 1, "124/0H": 2, "124/3I": 1,
+    "125/0H": 2, "125/0L": 0, "125/3F": 13, "125/3I": 1, "125/CF": 3, "128/0F": 0,
+    "128/0H": 2, "128/3C": 15, "128/3I": 1, "128/CO": 3, "12G/0C": 15, "12G/0H": 12,
+    "12H/0C": 15, "12H/3I": 1, "12X/0H": 12, "134/0F": 5, "134/0G": 1, "134/CF": 0,
+    "135/0F": 5, "135/0L": 0, "135/CF": 13, "138/0F": 0, "138/CF": 0, "138/CO": 0,
+    "139/0C": 15, "139/0F": 12, "139/0P": 12, "139/CF": 0, "13C/0F": 9, "13C/0G": 15,
+    "13G/0C": 8, "13G/0F": 5, "13H/0C": 12, "13H/0F": 12, "145/0G": 5, "145/0L": 13,
+    "145/3F": 7, "146/0C": 7, "146/0G": 7, "146/0M": 7, "146/CM": 7, "147/03": 6,
+    "147/0G": 6, "147/0H": 6, "147/3C": 6, "14G/03": 12, "14H/0C": 15, "14H/0G": 4,
+    "14W/0G": 4, "156/0C": 4, "156/0L": 4, "156/4F": 5, "156/7C": 15, "156/CF": 13,
+    "15G/0C": 4, "15G/0L": 4, "15H/0C": 4, "15H/0L": 4, "15H/CF": 13, "15L/CF": 13,
+    "15L/Fb": 3, "15b/0L": 13, "168/0C": 8, "168/0F": 0, "168/CF": 12, "168/CO": 12,
+    "169/0C": 9, "169/0P": 12, "169/3M": 13, "169/3P": 13, "169/CP": 13, "16G/0C": 15,
+    "16H/0C": 15, "178/03": 1, "178/0F": 0, "178/0H": 0, "178/3C": 13, "178/CF": 13,
+    "178/CO": 12, "179/03": 13, "179/0H": 0, "179/0P": 12, "179/3C": 9, "179/3P": 13,
+    "17C/03": 0, "17C/0F": 5, "17C/0G": 1, "17C/0H": 0, "17C/3F": 15, "17G/0C": 15,
+    "17G/0H": 15, "17H/0C": 15, "17H/3C": 1, "17X/0H": 3, "18B/0F": 10, "18B/CF": 13,
+    "18B/CO": 15, "18H/0C": 15, "18H/0F": 0, "18H/CO": 12, "19H/0C": 8, "19H/0P": 12,
+    "19H/3P": 13, "1AG/0C": 8, "1AG/0Q": 11, "1AH/0C": 3, "1BC/03": 0, "1BC/0F": 5,
+    "1BC/0G": 1, "1BG/0C": 15, "1BG/0F": 12, "1BH/0C": 15, "1BH/0F": 12, "1CH/0G": 15,
+    "1CH/3F": 0, "1DH/0C": 13, "1EH/0C": 8, "1EH/3F": 7, "1FG/0C": 8, "1FH/0C": 8,
+    "1FH/3C": 0, "1GH/0C": 15, "1GW/0C": 0, "1HX/0C": 1, "234/0C": 0, "234/0F": 5,
+    "234/0G": 2, "234/CF": 12, "235/0C": 4, "235/0F": 5, "235/0L": 12, "235/CF": 4,
+    "238/0C": 15, "238/0F": 12, "238/CF": 14, "239/0C": 15, "239/0F": 12, "239/CF": 0,
+    "23C/0F": 9, "23G/0C": 4, "23G/0F": 12, "245/0F": 5, "245/0L": 7, "245/3F": 7,
+    "245/3I": 15, "246/0F": 5, "246/0M": 7, "246/3I": 6, "246/3M": 10, "246/CF": 14,
+    "246/CM": 7, "24G/03": 15, "24G/0F": 5, "258/3C": 15, "258/3F": 12, "25L/3F": 7,
+    "25L/Fb": 3, "268/3C": 6, "268/3M": 3, "268/CF": 12, "269/3F": 6, "269/3M": 9,
+    "269/CF": 0, "269/CP": 6, "278/03": 10, "278/3C": 15, "278/3J": 7, "278/CF": 12,
+    "279/03": 2, "279/3J": 9, "27C/03": 15, "27C/0F": 3, "27C/3J": 7, "28A/0Q": 11,
+    "28A/3C": 15, "28A/3Q": 15, "2AG/0Q": 14, "2FG/0C": 9, "345/0G": 5, "345/0L": 7,
+    "345/CF": 15, "346/0C": 6, "346/0G": 5, "346/0M": 7, "346/CF": 5, "346/CM": 7,
+    "348/0F": 12, "348/0G": 4, "348/0K": 8, "348/CF": 12, "348/CO": 4, "349/0C": 9,
+    "349/0G": 12, "349/CF": 13, "34G/0F": 5, "34W/0G": 15, "358/0F": 12, "358/0L": 1,
+    "358/CF": 13, "359/0C": 9, "359/0L": 12, "359/1F": 12, "359/CF": 13, "35C/0F": 5,
+    "35C/0L": 0, "35G/0F": 12, "35G/0L": 4, "35L/CF": 13, "35L/Fb": 12, "35b/0L": 12,
+    "368/0C": 15, "368/0F": 12, "368/CF": 6, "368/CM": 15, "369/0C": 9, "369/CM": 9,
+    "369/CP": 12, "36C/0F": 9, "36G/0C": 15, "36G/0F": 12, "378/0F": 12, "378/CF": 12,
+    "37G/0F": 12, "389/0C": 9, "389/0F": 10, "389/CF": 9, "389/CP": 11, "38A/0C": 11,
+    "38A/0F": 10, "38A/0Q": 11, "38A/CF": 10, "38A/CQ": 15, "38A/FQ": 12, "38G/0F": 10,
+    "39G/0C": 8, "39G/0F": 12, "3AG/0C": 8, "3AG/0F": 12, "3AG/0Q": 12, "3BG/0F": 10,
+    "3CG/0F": 10, "3FG/0C": 4, "3GW/0F": 0, "456/0L": 7, "456/0M": 7, "456/3F": 7,
+    "456/7C": 6, "456/CM": 7, "457/03": 6, "457/0L": 6, "457/3F": 6, "457/3L": 6,
+    "457/FL": 6, "468/0K": 8, "468/0M": 3, "468/CF": 7, "468/CM": 7, "468/CO": 4,
+    "46G/03": 6, "46G/0M": 3, "478/03": 5, "478/0K": 8, "478/CF": 9, "478/CO": 4,
+    "479/03": 5, "47G/03": 9, "4BG/03": 2, "4GJ/03": 15, "4JK/03": 15, "568/4F": 5,
+    "568/7C": 6, "568/CF": 7, "569/1F": 5, "569/3M": 9, "569/7C": 6, "56L/4F": 5,
+    "56L/7C": 5, "56L/Fb": 7, "578/03": 5, "578/3L": 0, "578/CF": 6, "578/FL": 4,
+    "579/03": 1, "579/1F": 5, "579/3D": 9, "579/3L": 0, "579/FL": 1, "57L/Fb": 6,
+    "57b/3L": 4, "57b/FL": 4, "59H/1F": 5, "5AG/0L": 1, "5AG/0Q": 15, "5AL/FQ": 5,
+    "5AL/Fb": 10, "5Ab/0L": 0, "5BL/CF": 5, "5BL/Fb": 12, "5FG/03": 5, "5FL/03": 1,
+    "5Lr/Fb": 12, "5Vb/FL": 0, "678/03": 6, "678/0C": 6, "678/3M": 4, "678/CF": 6,
+    "67G/0C": 4, "6AG/0E": 10, "6AG/0Q": 14, "6FG/0C": 4, "78G/03": 5, "79G/03": 9,
+    "7AG/03": 10, "7AG/0Q": 14, "7CG/03": 1, "7CG/0F": 5, "9JP/3f": 0, "ABG/0C": 8,
+    "ABG/0Q": 8, "AFG/03": 10, "AFG/0Q": 3, "AGW/0Q": 3, "BCG/03": 2, "BCG/0F": 10,
+    "BDG/0F": 11, "BFG/03": 2,
+}
+_OPENING_BOOK_MAX_STONES = max((len(key) - 1 for key in _OPENING_BOOK), default=-1)
+
+
+class _SearchTimeout(Exception):
+    """探索の制限時間を超えたことを知らせる例外"""
+
+
+def _popcount(bits: int) -> int:
+    """立っているビット数を返す（Python 3.9 互換のため int.bit_count は使わない）"""
+    return bin(bits).count("1")
+
+
 class MyAI(Alg3D):
-    def __init__(self):
-        """AI初期化（メモリ効率化のためキャッシュを追加）"""
-        self._evaluation_cache = {}  # 評価結果のキャッシュ
-        self._cache_hits = 0
-        self._cache_misses = 0
+    def __init__(
+        self,
+        search_time: float = 2.0,
+        verbosity: int = VERBOSITY_QUIET,
+        use_opening_book: bool = True,
+        endgame_empty_cells: int = _ENDGAME_EMPTY_CELLS,
+        endgame_node_budget: int = _ENDGAME_NODE_BUDGET,
+        lmr_reduction: int = _LMR_REDUCTION,
+        lmr_min_depth: int = _LMR_MIN_DEPTH,
+        lmr_min_moves: int = _LMR_MIN_MOVES,
+        threat_extension: int = _THREAT_EXTENSION,
+        use_proof_search: bool = True,
+        proof_node_budget: int = _PROOF_NODE_BUDGET,
+        instrument: bool = False,
+        profile: bool = False,
+    ):
+        """AI初期化
+        
+        search_time: 1手あたりの探索に使うCPU秒数
+        verbosity: 出力レベル
+        use_opening_book: 定跡を使うか
+        endgame_empty_cells: 空きマスがこの数以下なら終盤ソルバーで完全に読み切る
+        endgame_node_budget: 終盤ソルバーのノード数の上限
+        lmr_reduction: 後ろの方に並んだ静かな手を浅く読む深さ（0で無効）
+        lmr_min_depth: 残りの深さがこれ以上の局面でだけ浅く読む
+        lmr_min_moves: 並べ替えでこの数より後ろの手だけを浅く読む
+        threat_extension: リーチを塞ぐしかない局面を深く読む深さ（0で無効）
+        use_proof_search: 緊迫した局面で、通常の探索の前に証明数探索で必勝かを調べるか
+        proof_node_budget: 証明数探索のノード数の上限
+        instrument: 探索の統計（search_report）を取るか（開発用、提出時は False のまま）
+        profile: 1手ごとに cProfile で記録するか（開発用、記録は last_profile に残る）
+        """
+        self.search_time = search_time
+        self.verbosity = verbosity
+        self.use_opening_book = use_opening_book
+        self.endgame_empty_cells = endgame_empty_cells
+        self.endgame_node_budget = endgame_node_budget
+        self.lmr_reduction = lmr_reduction
+        self.lmr_min_depth = lmr_min_depth
+        self.lmr_min_moves = lmr_min_moves
+        self.threat_extension = threat_extension
+        self.use_proof_search = use_proof_search
+        self.proof_node_budget = proof_node_budget
+        self._book_move = False  # 直前の手が定跡から選ばれたか
+        self._threat_win_move = False  # 直前の手がリーチの連続で勝ち切る手か
+        # ビットボード（get_move の開始時に Board から構築）
+        self._bits = [0, 0, 0]  # プレイヤー番号 -> 石のビット集合（添字0は未使用）
+        self._heights = [0] * 16  # 列番号 -> 次に石が落ちる z（4 は満杯）
+        self._line_counts = [None, [0] * _NUM_LINES, [0] * _NUM_LINES]  # プレイヤー番号 -> ライン別の石数
+        # 脅威マス（自分の石が3個あるラインの残り1マス）: マス別のライン数と、1本以上あるマスのビット
+        self._threat_counts = [None, [0] * 64, [0] * 64]
+        self._threats = [0, 0, 0]
+        # 静的評価のライン部分（プレイヤー1視点、make/unmake で変わったラインの分だけ更新）
+        self._line_score = 0
+        # 盤面を8通りに対称変換した各 Zobrist ハッシュ（make/unmake で差分更新、添字0が元の盤面）
+        # 最小のものを標準形のキーとし、対称な局面で置換表を共有する
+        self._hashes = [0] * _NUM_SYMMETRIES
+        
+        # 置換表: スロット -> キー, 深さ, 種類, 評価値, 最善の列, 石数（項目ごとの型付き配列、キー0は空き）
+        # get_move をまたいで保持し、石数が現局面より少ない（もう現れない）エントリから置き換える
+        self._tt_keys = array("Q", bytes(8 * _TT_SIZE))
+        self._tt_depths = array("b", bytes(_TT_SIZE))
+        self._tt_flags = array("b", bytes(_TT_SIZE))
+        self._tt_scores = array("i", bytes(4 * _TT_SIZE))
+        self._tt_moves = array("b", bytes(_TT_SIZE))
+        self._tt_stones = array("b", bytes(_TT_SIZE))
+        self._root_stones = 0  # 探索開始局面の石数
+        
+        # 前回の探索の読み筋（次の get_move で相手が予想通りに応じたかを確かめる）
+        self._pv = []  # 前回の読み筋（列番号の列、先頭が自分の手）
+        self._predicted_key = None  # 読み筋の2手後の局面の標準形キー
+        self._resume_depth = 1  # 次の探索を始める深さ
+        
+        # 探索（反復深化αβ）の状態
+        self._deadline = 0.0  # 探索を打ち切る process_time
+        self._move_start = 0.0  # この手の思考を始めた process_time
+        self._time_budget = 0.0  # この手に割り当てた探索時間
+        self._time_log = []  # 1手ごとの (割り当てた時間, 実際に使った時間)
+        self._best_move_so_far = None  # 思考を打ち切った場合に返す、これまでで最善の (x, y)
+        self._nodes = 0  # この手で探索したノード数（脅威探索・終盤ソルバー・αβ探索の合計）
+        self._search_depth = 0  # 最後に読み切った深さ
+        self._search_score = 0  # その深さでの評価値
+        self._search_best = 0  # その深さでの最善手の列番号
+        
+        # 手の並べ替え（置換表の手 → 勝ち・受け → キラー手 → 履歴）
+        self._killers = [[-1, -1] for _ in range(_MAX_PLY + 1)]  # 手数 -> βカットした列（2つ）
+        # 手数 -> 読む手の並びと並べ替えの点数（ノードごとにリストを作らず、先頭から書き込んで使い回す）
+        self._move_buffers = [[0] * 16 for _ in range(_MAX_PLY + 1)]
+        self._order_keys = [[[0] * count for count in range(17)] for _ in range(_MAX_PLY + 1)]  # [手数][手の数]
+        self._history = [None, [0] * 64, [0] * 64]  # [プレイヤー][セル] -> βカットへの貢献度
+        self._cutoffs = 0  # βカットの回数
+        self._first_move_cutoffs = 0  # そのうち最初に試した手でカットした回数
+        self._depth_nodes = []  # 読み切った深さごとのノード数
+        # 読み切った深さごとの探索窓の統計（深さ, 評価値, 最初の窓, 下に外れた回数, 上に外れた回数, ノード数）
+        self._iteration_stats = []
+        self._pvs_researches = 0  # ヌルウィンドウで調べた手が α を超え、全幅で読み直した回数
+        self._lmr_researches = 0  # 浅く読んだ手が α を超え、元の深さで読み直した回数
+        self._extension_limit = 0  # この手数までしか深く読まない（脅威の応酬で探索が止まらないように）
+        
+        # 終盤ソルバー: スロット -> キー, 種類, 評価値（勝敗と手数だけを扱う専用の表、キー0は空き）
+        self._solved_keys = array("Q", bytes(8 * _SOLVED_TABLE_SIZE))
+        self._solved_flags = array("b", bytes(_SOLVED_TABLE_SIZE))
+        self._solved_scores = array("i", bytes(4 * _SOLVED_TABLE_SIZE))
+        self._node_limit = _UNLIMITED_NODES  # このノード数に達したら探索・読み切りを諦める
+        self._endgame_result = None  # 直前の手を終盤ソルバーで決めた場合の評価値
+        
+        # 証明数探索: スロット -> キー, φ, δ（表の大きさは固定で、キー0は空き）
+        self._proof_keys = array("Q", bytes(8 * _PROOF_TABLE_SIZE))
+        self._proof_phis = array("I", bytes(4 * _PROOF_TABLE_SIZE))
+        self._proof_deltas = array("I", bytes(4 * _PROOF_TABLE_SIZE))
+        self._proof_attacker = 0  # 表の内容が、どちらのプレイヤーの必勝を調べたものか
+        self._proof_result = None  # 直前の手の証明数探索の結果（必勝なら True、必勝でないなら False）
+        self._proof_nodes = 0  # 直前の手の証明数探索のノード数
+        self._proof_best_col = None  # 証明数探索で最後に勝ちが証明された局面の、勝ち切る列
+        
+        # 探索の計測（enable_instrumentation を呼ぶまでは None のままで、探索には一切手を加えない）
+        self._stats = None
+        self.last_profile = None  # profile=True のとき、直前の手の cProfile.Profile
+        if instrument or profile:
+            self.enable_instrumentation(timing=instrument, profile=profile)
     
     def get_move(
         self,
@@ -15,33 +495,66 @@ class MyAI(Alg3D):
         player: int, # 先手(黒):1 後手(白):2
         last_move: Tuple[int, int, int] # 直前に置かれた場所(x, y, z)
     ) -> Tuple[int, int]:
-        # 可視化: 現在の盤面と置けるマスを表示
-        self.visualize_board(board)
-        self.print_legal_moves(board)
+        debug = self.verbosity >= VERBOSITY_DEBUG
         
-        # 可視化: 各マスのアクセス可能ライン数を表示
-        self.print_line_accessibility(board, player)
-        
-        # 可視化: 各マスの重み（点数）を表示
-        self.print_position_scores(board, player)
-        
-        # 可視化: 各マスで妨害できる相手の石数を表示
-        self.print_opponent_interference(board, player)
-        
-        # 基本的なAIアルゴリズムを実装
-        move = self.find_best_move(board, player)
+        # 可視化は評価を何度も行うため、デバッグ時のみ実行する
+        if debug:
+            # 可視化: 現在の盤面と置けるマスを表示
+            self.visualize_board(board)
+            self.print_legal_moves(board)
+            
+            # 可視化: 各マスのアクセス可能ライン数を表示
+            self.print_line_accessibility(board, player)
+            
+            # 可視化: 各マスの重み（点数）を表示
+            self.print_position_scores(board, player)
+            
+            # 可視化: 各マスで妨害できる相手の石数を表示
+            self.print_opponent_interference(board, player)
+            
+            # 可視化: 保留中の脅威と段の偶奇を表示
+            self.print_parity_analysis(board)
         
-        # 可視化: AIの選択理由を表示
-        self.print_move_reason(board, player, move)
+        # 例外の時に返す手を先に用意し、以降の思考はこの手を改善するだけにする
+        self._best_move_so_far = self.find_first_available_move(board)
         
-        # キャッシュ統計を表示（デバッグ用）
-        total_calls = self._cache_hits + self._cache_misses
-        if total_calls > 0:
-            hit_rate = self._cache_hits / total_calls * 100
-            print(f"\n💾 キャッシュ統計: ヒット率 {hit_rate:.1f}% ({self._cache_hits}/{total_calls})")
+        try:
+            # 一瞬で決まる安全な手
+            safe_move = self.find_safe_move(board, player)
+            if safe_move is not None:
+                self._best_move_so_far = safe_move
+            
+            # 前回の探索の続きから読めるか確認
+            self._prepare_resume(board, last_move)
+            
+            # 基本的なAIアルゴリズムを実装
+            move = self.find_best_move(board, player)
+        except Exception as error:
+            # 例外で左上に置かれないよう、それまでに見つかった最善の手を返す
+            if debug:
+                print(f"⚠️ 思考中に例外が発生したため、それまでの最善手を返します: {error!r}")
+            move = self._best_move_so_far
+        self._time_log.append((self._time_budget, time.process_time() - self._move_start))
+        
+        if debug:
+            # 可視化: AIの選択理由を表示
+            self.print_move_reason(board, player, move)
+            
+            # 可視化: 割り当てた時間と実際に使った時間を表示
+            self.print_time_usage()
         
         return move
 
+    def print_time_usage(self) -> None:
+        """直前の手の割り当て時間と使用時間、これまでの手の集計を表示"""
+        if not self._time_log:
+            return
+        budget, used = self._time_log[-1]
+        used_times = [used for _, used in self._time_log]
+        print(f"\n⏱️ 時間: 割り当て {budget:.2f}秒 / 使用 {used:.2f}秒 "
+              f"（上限 {_CPU_TIME_LIMIT - _TIME_SAFETY_MARGIN:.2f}秒, "
+              f"{len(used_times)}手の平均 {sum(used_times) / len(used_times):.2f}秒, 最大 {max(used_times):.2f}秒）")
+
     def get_legal_moves(self, board: Board) -> List[Tuple[int, int, int]]:
         """現在置けるすべての手を (x, y, z) で返す。満杯列は除外。"""
         moves: List[Tuple[int, int, int]] = []
@@ -67,128 +580,13 @@ class MyAI(Alg3D):
     
     def count_accessible_lines(self, board: Board, x: int, y: int, z: int, player: int) -> int:
         """指定位置に石を置いた時にアクセスできる勝利ライン数をカウント"""
-        # 仮想的に石を置く
-        temp_board = [[[board[z][y][x] for x in range(4)] for y in range(4)] for z in range(4)]
-        temp_board[z][y][x] = player
-        
-        accessible_lines = 0
-        
-        # 13方向の直線をチェック
-        directions = [
-            (1, 0, 0),   # x軸方向
-            (0, 1, 0),   # y軸方向
-            (0, 0, 1),   # z軸方向
-            (1, 1, 0),   # xy対角線
-            (1, 0, 1),   # xz対角線
-            (0, 1, 1),   # yz対角線
-            (1, 1, 1),   # xyz対角線
-            (1, -1, 0),  # xy逆対角線
-            (1, 0, -1),  # xz逆対角線
-            (0, 1, -1),  # yz逆対角線
-            (1, -1, -1), # xyz逆対角線
-            (1, 1, -1),  # xy正、z負対角線
-            (1, -1, 1),  # xy負、z正対角線
-        ]
-        
-        for dx, dy, dz in directions:
-            count = 1  # 現在の石を含む
-            
-            # 正方向にカウント
-            nx, ny, nz = x + dx, y + dy, z + dz
-            while 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4 and temp_board[nz][ny][nx] == player:
-                count += 1
-                nx, ny, nz = nx + dx, ny + dy, nz + dz
-            
-            # 負方向にカウント
-            nx, ny, nz = x - dx, y - dy, z - dz
-            while 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4 and temp_board[nz][ny][nx] == player:
-                count += 1
-                nx, ny, nz = nx - dx, ny - dy, nz - dz
-            
-            # 4つ以上並ぶ可能性があるラインをカウント
-            if count >= 2:  # 2つ以上並んでいるライン
-                accessible_lines += 1
-        
-        return accessible_lines
+        self._load_board(board)
+        return self._count_accessible_runs(x + 4 * y + 16 * z, player)
     
     def classify_directions(self, board: Board, x: int, y: int, z: int, player: int) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]], List[Tuple[int, int, int]]]:
         """指定位置に石を置いた時に、方向を3つに分類して返す"""
-        my_accessible_directions = []  # 自分のアクセスライン（自分の石しかないか空）
-        opponent_accessible_directions = []  # 相手のアクセスライン（相手の石しかない）
-        mixed_directions = []  # 混在ライン（自分の石と相手の石が混在）
-        
-        opponent = 3 - player
-        
-        # 13方向の直線をチェック
-        directions = [
-            (1, 0, 0),   # x軸方向
-            (0, 1, 0),   # y軸方向
-            (0, 0, 1),   # z軸方向
-            (1, 1, 0),   # xy対角線
-            (1, 0, 1),   # xz対角線
-            (0, 1, 1),   # yz対角線
-            (1, 1, 1),   # xyz対角線
-            (1, -1, 0),  # xy逆対角線
-            (1, 0, -1),  # xz逆対角線
-            (0, 1, -1),  # yz逆対角線
-            (1, -1, -1), # xyz逆対角線
-            (1, 1, -1),  # xy正、z負対角線
-            (1, -1, 1),  # xy負、z正対角線
-        ]
-        
-        for dx, dy, dz in directions:
-            # 正方向の最大距離と障害物チェック
-            max_pos = 0
-            has_opponent_stone = False
-            for i in range(1, 4):
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    if board[nz][ny][nx] == opponent:
-                        has_opponent_stone = True
-                        break
-                    max_pos = i
-                else:
-                    break
-            
-            # 負方向の最大距離と障害物チェック
-            max_neg = 0
-            for i in range(1, 4):
-                nx, ny, nz = x - i*dx, y - i*dy, z - i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    if board[nz][ny][nx] == opponent:
-                        has_opponent_stone = True
-                        break
-                    max_neg = i
-                else:
-                    break
-            
-            # 合計で4つ以上並べるかチェック
-            if max_pos + max_neg + 1 >= 4:
-                # ライン上の石の種類をチェック
-                my_stones = 0
-                opponent_stones = 0
-                
-                for i in range(-max_neg, max_pos + 1):
-                    if i == 0:
-                        continue  # 自分の位置はスキップ
-                    nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                    if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                        if board[nz][ny][nx] == player:
-                            my_stones += 1
-                        elif board[nz][ny][nx] == opponent:
-                            opponent_stones += 1
-                
-                # 分類
-                if my_stones > 0 and opponent_stones > 0:
-                    mixed_directions.append((dx, dy, dz))
-                elif my_stones > 0:
-                    my_accessible_directions.append((dx, dy, dz))
-                elif opponent_stones > 0:
-                    opponent_accessible_directions.append((dx, dy, dz))
-                else:
-                    my_accessible_directions.append((dx, dy, dz))  # 空のラインは自分のアクセスライン
-        
-        return my_accessible_directions, opponent_accessible_directions, mixed_directions
+        self._load_board(board)
+        return self._classify_cell(x + 4 * y + 16 * z, player)
     
     def get_accessible_directions(self, board: Board, x: int, y: int, z: int, player: int) -> List[Tuple[int, int, int]]:
         """指定位置に石を置いた時に、アクセス可能な方向の配列を返す（後方互換性のため）"""
@@ -197,37 +595,8 @@ class MyAI(Alg3D):
     
     def count_stones_in_directions(self, board: Board, x: int, y: int, z: int, directions: List[Tuple[int, int, int]], target_player: int) -> int:
         """指定された方向リスト内で、対象プレイヤーの石の数をカウント"""
-        stone_count = 0
-        
-        for dx, dy, dz in directions:
-            # 正方向の最大距離を計算
-            max_pos = 0
-            for i in range(1, 4):
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    max_pos = i
-                else:
-                    break
-            
-            # 負方向の最大距離を計算
-            max_neg = 0
-            for i in range(1, 4):
-                nx, ny, nz = x - i*dx, y - i*dy, z - i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    max_neg = i
-                else:
-                    break
-            
-            # この方向の対象プレイヤーの石をカウント
-            for i in range(-max_neg, max_pos + 1):
-                if i == 0:
-                    continue  # 自分の位置はスキップ
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    if board[nz][ny][nx] == target_player:
-                        stone_count += 1
-        
-        return stone_count
+        self._load_board(board)
+        return self._count_stones_on_rays(x + 4 * y + 16 * z, directions, target_player)
     
     def count_potential_lines(self, board: Board, x: int, y: int, z: int, player: int) -> int:
         """指定位置に石を置いた時に、4つ並ぶ可能性があるライン数をカウント"""
@@ -238,14 +607,14 @@ class MyAI(Alg3D):
         print(f"\n📊 プレイヤー{player}の各マスアクセス可能ライン数:")
         print("  x→   0 1 2 3    （値＝4つ並ぶ可能性があるライン数）")
         
+        _, _, breakdown = self.evaluate_all_positions(board, player)
+        lines = breakdown["lines"]
         for y in range(3, -1, -1):
             print(f"y={y} |", end=" ")
             for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
+                if lines[y][x] is not None:
                     # 常に潜在的なライン数を表示
-                    lines = self.count_potential_lines(board, x, y, z, player)
-                    print(f"{lines:2d}", end=" ")
+                    print(f"{lines[y][x]:2d}", end=" ")
                 else:
                     print(" .", end=" ")
             print()
@@ -287,6 +656,35 @@ class MyAI(Alg3D):
             print("🛡️ 理由: 防御手")
             return
         
+        if self._book_move:
+            print("📖 理由: 定跡")
+            return
+        
+        if self._threat_win_move:
+            print("⚔️ 理由: リーチの連続で勝ち切り")
+            return
+        
+        if self._proof_result:
+            print(f"🧩 理由: 証明数探索で必勝を証明 ({self._proof_nodes}ノード)")
+            return
+        
+        if self._endgame_result is not None:
+            result = self._endgame_result
+            if result >= _MATE_THRESHOLD:
+                outcome = f"{_WIN_SCORE - result + 1}手で勝ち"
+            elif result <= -_MATE_THRESHOLD:
+                outcome = f"{_WIN_SCORE + result + 1}手で負け"
+            else:
+                outcome = "引き分け"
+            print(f"🧮 理由: 終盤の完全読み ({outcome})")
+            return
+        
+        if self._search_depth > 0 and self._column_to_move(self._search_best) == move:
+            print(f"🔍 理由: αβ探索 (深さ{self._search_depth}, 評価値{self._search_score})")
+            print("読み筋:", [self._column_to_move(col) for col in self._pv])
+            print("手の並べ替え:", self._ordering_summary())
+            return
+        
         best_line_move = self.find_highest_line_access_move(board, player)
         if best_line_move and best_line_move == move:
             score = self.evaluate_position(board, move[0], move[1], self.get_height(board, move[0], move[1]), player, 0)
@@ -296,8 +694,23 @@ class MyAI(Alg3D):
         print("📍 理由: フォールバック")
     
     def print_position_scores(self, board: Board, player: int) -> None:
-        """各マスの重み（点数）を詳細表示"""
+        """各マスの重み（点数）を詳細表示（全ての列をまとめて評価した内訳を使う）"""
         print(f"\n🎯 プレイヤー{player}の各マス重み詳細:")
+        scores, _, breakdown = self.evaluate_all_positions(board, player)
+        
+        def print_grid(values, cell_text) -> None:
+            """満杯の列を . にして、各マスの値を cell_text で整形して表示"""
+            for y in range(3, -1, -1):
+                print(f"y={y} |", end=" ")
+                for x in range(4):
+                    if values[y][x] is not None:
+                        print(cell_text(values[y][x]), end=" ")
+                    else:
+                        print(" .", end=" ")
+                print()
+        
+        def bonus_text(value) -> str:
+            return f"+{value:2d}" if value > 0 else "  0"
         
         # 各重みの詳細を表示
         print("\n📊 重み詳細:")
@@ -305,557 +718,185 @@ class MyAI(Alg3D):
         
         # 1. アクセス可能ライン数
         print("\n1️⃣ アクセス可能ライン数 (1ライン=2点):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    lines = self.count_potential_lines(board, x, y, z, player)
-                    print(f"{lines*1:2d}", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
+        print_grid(breakdown["lines"], lambda lines: f"{lines * 2:2d}")
         
-        # 2. アクセスライン上の自分の石の数（距離重み付け）
-        print("\n2️⃣ アクセスライン上の自分の石の数 (距離1=6点, 距離2=4点, 距離3=2点):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    own_stones = self.count_own_stones_in_lines(board, x, y, z, player)
-                    print(f"{own_stones*2:2d}", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
-        
-        # 2-1. 混在時の相手石による減点
-        print("\n2️⃣-1 混在時の相手石による減点 (1石=2点減点):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    own_stones = self.count_own_stones_in_lines(board, x, y, z, player)
-                    opponent_stones = self.count_opponent_stones_in_lines(board, x, y, z, player)
-                    if own_stones > 0 and opponent_stones > 0:
-                        penalty = opponent_stones * 2
-                        print(f"-{penalty:2d}", end=" ")
-                    else:
-                        print("  0", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
-        
-        # 2-2. 相手の石のみの場合の段階的加点
-        print("\n2️⃣-2 相手の石のみの場合の段階的加点 (1石目=2点, 2石目=4点, 3石目=6点):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    own_stones = self.count_own_stones_in_lines(board, x, y, z, player)
-                    opponent_stones = self.count_opponent_stones_in_lines(board, x, y, z, player)
-                    if own_stones == 0 and opponent_stones > 0:
-                        # 段階的加点の計算
-                        bonus = 0
-                        for i in range(opponent_stones):
-                            bonus += (i + 1) * 2
-                        print(f"+{bonus:2d}", end=" ")
-                    else:
-                        print("  0", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
+        # 2. アクセスライン上の自分の石の数
+        # （相手の石を含むラインはアクセスできないため、相手の石による加点・減点は常に0で表示しない）
+        print("\n2️⃣ アクセスライン上の自分の石の数 (1石=2点):")
+        print_grid(breakdown["own_stones"], lambda stones: f"{stones * 2:2d}")
         
         # 3. 角と中央の4マスの位置ボーナス
         print("\n3️⃣ 角と中央の4マスの位置ボーナス (2点):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    if (x == 0 or x == 3) and (y == 0 or y == 3):  # 角の4マス
-                        print("  2", end=" ")
-                    elif (x == 1 or x == 2) and (y == 1 or y == 2):  # 中央の4マス
-                        print("  2", end=" ")
-                    else:
-                        print("  0", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
+        print_grid(breakdown["position_bonus"], lambda bonus: f"{bonus:3d}")
         
         # 4. ダブルリーチ報酬
         print("\n4️⃣ ダブルリーチ報酬 (2個目以降=100点):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    double_reach_lines = self.count_double_reach_lines(board, x, y, z, player)
-                    if double_reach_lines >= 2:
-                        bonus = (double_reach_lines - 1) * 100  # 2個目以降=100点
-                        print(f"+{bonus:2d}", end=" ")
-                    else:
-                        print("  0", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
+        print_grid(breakdown["double_reach"], lambda lines: bonus_text(max(0, lines - 1) * 100))
         
         # 5. ダブルリーチ妨害
         print("\n5️⃣ ダブルリーチ妨害 (2個目以降=100点):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    opponent_double_reach_lines = self.count_opponent_double_reach_lines(board, x, y, z, player)
-                    if opponent_double_reach_lines >= 2:
-                        bonus = (opponent_double_reach_lines - 1) * 100  # 2個目以降=100点
-                        print(f"+{bonus:2d}", end=" ")
-                    else:
-                        print("  0", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
-        
-        # 6. 罠回避（統合版・depth別重み）
-        print("\n6️⃣ 罠回避 (自分の手:勝利手100点減点,最大点数*0.5 / 相手の手:勝利手80点減点,最大点数*0.4):")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    opponent_winning_moves = self.check_opponent_winning_moves_after_my_move(board, x, y, z, player)
-                    opponent_max_score = self.get_opponent_max_score_after_my_move(board, x, y, z, player)
-                    
-                    if opponent_winning_moves > 0:
-                        penalty = opponent_winning_moves * 100  # 自分の手の重みで表示
-                        print(f"-{penalty:2d}", end=" ")
-                    else:
-                        penalty = int(opponent_max_score * 0.5)  # 自分の手の重みで表示
-                        if penalty > 0:
-                            print(f"-{penalty:2d}", end=" ")
-                        else:
-                            print("  0", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
+        print_grid(breakdown["opponent_double_reach"], lambda lines: bonus_text(max(0, lines - 1) * 100))
+        
+        # 6. 罠回避（置いた後に相手が勝てる手があればその数、なければ相手の最大点数で減点）
+        print("\n6️⃣ 罠回避 (相手の勝利手1個=100点減点, なければ相手の最大点数*0.9を減点):")
+        penalties = [
+            [None if wins is None else (wins * 100 if wins > 0 else int(max_score * 0.9))
+             for wins, max_score in zip(wins_row, max_row)]
+            for wins_row, max_row in zip(breakdown["opponent_wins"], breakdown["opponent_max_score"])
+        ]
+        print_grid(penalties, lambda penalty: f"-{penalty:2d}" if penalty > 0 else "  0")
         
         # 7. 合計
         print("\n🎯 合計点数:")
-        for y in range(3, -1, -1):
-            print(f"y={y} |", end=" ")
-            for x in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    score = self.evaluate_position(board, x, y, z, player, 0)
-                    print(f"{int(score):2d}", end=" ")
-                else:
-                    print(" .", end=" ")
-            print()
+        print_grid(scores, lambda score: f"{int(score):2d}")
+    
+    def _prepare_resume(self, board: Board, last_move: Tuple[int, int, int]) -> None:
+        """相手の直前の手が前回の読み筋通りなら、読み切った深さの続きから探索を再開する"""
+        self._resume_depth = 1
+        pv, predicted_key = self._pv, self._predicted_key
+        self._pv, self._predicted_key = [], None
+        if predicted_key is None or len(pv) < 2 or not last_move or last_move[0] is None:
+            return
+        if (last_move[0], last_move[1]) != self._column_to_move(pv[1]):
+            return  # 予想外の応手
+        self._load_board(board)
+        if self._canonical_hash()[0] != predicted_key:
+            return  # 自分の手が読み筋と違う、または別の対局
+        # 2手分は前回の探索で読み切っているため、その深さから始める
+        self._resume_depth = max(1, self._search_depth - 2)
+        self._pv = pv[2:]
     
     def find_best_move(self, board: Board, player: int):
         """最適な手を見つける"""
+        start = time.process_time()
+        self._move_start = start
+        self._time_budget = 0.0
+        self._nodes = 0
+        # どの段階で手を決めたかの記録（print_move_reason 用）を前の手から持ち越さない
+        self._book_move = False
+        self._threat_win_move = False
+        self._proof_result = None
+        self._proof_nodes = 0
+        self._endgame_result = None
+        
+        # 盤面をビットボードに変換（以降の判定はすべてビット演算で行う）
+        self._load_board(board)
+        
         # 1. 勝利できる手があるかチェック
-        win_move = self.find_winning_move(board, player)
-        if win_move:
-            return win_move
+        win_col = self._find_winning_column(player)
+        if win_col is not None:
+            return self._column_to_move(win_col)
         
         # 2. 相手の勝利を阻止する手があるかチェック
         opponent = 3 - player  # 相手のプレイヤー番号
-        block_move = self.find_winning_move(board, opponent)
-        if block_move:
-            return block_move
-        
-        # 3. 最もアクセス可能なライン数が多い位置を探す
-        best_move = self.find_highest_line_access_move(board, player)
-        if best_move:
-            return best_move
-        
-        # 4. 空いている最初の位置に置く
+        block_col = self._find_winning_column(opponent)
+        if block_col is not None:
+            return self._column_to_move(block_col)
+        
+        # 3. 序盤は定跡から選ぶ
+        if self.use_opening_book:
+            book_col = self._find_opening_book_column()
+            if book_col is not None:
+                self._book_move = True
+                return self._column_to_move(book_col)
+        
+        # 以降の探索に使う時間を決める
+        budget = self._allocate_time()
+        self._time_budget = budget
+        
+        # 4. リーチの連続で勝ち切れる手を探し、相手に勝ち切られる手を除外する
+        threat_col, losing_cols = self._threat_analysis(player, budget * _THREAT_SEARCH_TIME_RATIO)
+        if threat_col is not None:
+            self._threat_win_move = True
+            return self._column_to_move(threat_col)
+        
+        # 5. 脅威マスが多い緊迫した局面では、証明数探索で必勝手順を探す（上限を超えたら次へ）
+        #    終盤ソルバーで読み切れる空きマスの数なら、そちらに任せる
+        empty_cells = 64 - _popcount(self._bits[1] | self._bits[2])
+        if (self.use_proof_search and empty_cells > self.endgame_empty_cells
+                and self._tactical_density() >= _PROOF_MIN_THREATS):
+            remaining_time = budget - (time.process_time() - start)
+            proof = self._proof_search(player, remaining_time * _PROOF_TIME_RATIO, self.proof_node_budget)
+            if proof is not None:
+                self._proof_result, proof_col = proof
+                if proof_col is not None:
+                    return self._column_to_move(proof_col)
+        
+        # 6. 空きマスが少なければ完全に読み切る（ノード数の上限を超えたら通常の探索へ）
+        if empty_cells <= self.endgame_empty_cells:
+            remaining_time = budget - (time.process_time() - start)
+            solved = self._solve_endgame(player, remaining_time * _ENDGAME_TIME_RATIO, self.endgame_node_budget)
+            if solved is not None:
+                self._endgame_result = solved[1]
+                return self._column_to_move(solved[0])
+        
+        # 7. 反復深化αβ探索で最善手を探す
+        remaining_time = budget - (time.process_time() - start)
+        best_col = self._search_best_column(player, remaining_time, losing_cols)
+        if best_col is not None:
+            return self._column_to_move(best_col)
+        
+        # 8. 最もアクセス可能なライン数が多い位置を探す
+        best_col = self._find_highest_score_column(player)
+        if best_col is not None:
+            return self._column_to_move(best_col)
+        
+        # 9. 空いている最初の位置に置く
         return self.find_first_available_move(board)
     
     def count_opponent_stones_in_lines(self, board: Board, x: int, y: int, z: int, player: int) -> int:
         """指定位置に石を置いた時に、アクセスできるライン上の相手の石の数をカウント"""
-        opponent = 3 - player
-        opponent_stones = 0
-        accessible_directions = self.get_accessible_directions(board, x, y, z, player)
-        
-        for dx, dy, dz in accessible_directions:
-            # 正方向の最大距離と障害物チェック
-            max_pos = 0
-            for i in range(1, 4):
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 他のプレイヤーの石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != player:
-                        break
-                    max_pos = i
-                else:
-                    break
-            
-            # 負方向の最大距離と障害物チェック
-            max_neg = 0
-            for i in range(1, 4):
-                nx, ny, nz = x - i*dx, y - i*dy, z - i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 他のプレイヤーの石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != player:
-                        break
-                    max_neg = i
-                else:
-                    break
-            
-                # このライン上で相手の石をカウント
-                for i in range(-max_neg, max_pos + 1):
-                    if i == 0:
-                        continue  # 自分の位置はスキップ
-                    nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                    if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                        if board[nz][ny][nx] == opponent:
-                            opponent_stones += 1
-        
-        return opponent_stones
+        self._load_board(board)
+        return self._count_opponent_stones_on_lines(x + 4 * y + 16 * z, player)
     
     def count_own_stones_in_lines(self, board: Board, x: int, y: int, z: int, player: int) -> int:
         """指定位置に石を置いた時に、アクセスできるライン上の自分の石を距離に応じて重み付けしてカウント"""
-        weighted_score = 0
-        accessible_directions = self.get_accessible_directions(board, x, y, z, player)
-        
-        for dx, dy, dz in accessible_directions:
-            # 正方向の最大距離と障害物チェック
-            max_pos = 0
-            for i in range(1, 4):
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 他のプレイヤーの石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != player:
-                        break
-                    max_pos = i
-                else:
-                    break
-            
-            # 負方向の最大距離と障害物チェック
-            max_neg = 0
-            for i in range(1, 4):
-                nx, ny, nz = x - i*dx, y - i*dy, z - i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 他のプレイヤーの石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != player:
-                        break
-                    max_neg = i
-                else:
-                    break
-            
-            # このライン上で自分の石を距離に応じて重み付けしてカウント
-            for i in range(-max_neg, max_pos + 1):
-                if i == 0:
-                    continue  # 自分の位置はスキップ
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    if board[nz][ny][nx] == player:
-                        distance = abs(i)  # 距離（1, 2, 3）
-                        # 距離が近いほど高い重み: 距離1=3点, 距離2=2点, 距離3=1点
-                        weight = 4 - distance  # 4-1=3, 4-2=2, 4-3=1
-                        weighted_score += weight
-        
-        return weighted_score
+        self._load_board(board)
+        return self._count_own_weighted(x + 4 * y + 16 * z, player)
     
     def count_double_reach_lines(self, board: Board, x: int, y: int, z: int, player: int) -> int:
         """指定位置に石を置いた時に、自分の石が2個以上あるアクセスライン数をカウント"""
-        double_reach_lines = 0
-        accessible_directions = self.get_accessible_directions(board, x, y, z, player)
-        
-        for dx, dy, dz in accessible_directions:
-            # 正方向の最大距離と障害物チェック
-            max_pos = 0
-            for i in range(1, 4):
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 他のプレイヤーの石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != player:
-                        break
-                    max_pos = i
-                else:
-                    break
-            
-            # 負方向の最大距離と障害物チェック
-            max_neg = 0
-            for i in range(1, 4):
-                nx, ny, nz = x - i*dx, y - i*dy, z - i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 他のプレイヤーの石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != player:
-                        break
-                    max_neg = i
-                else:
-                    break
-            
-            # このライン上で自分の石をカウント（自分を置く位置も含む）
-            own_count = 1  # 自分を置く位置
-            for i in range(-max_neg, max_pos + 1):
-                if i == 0:
-                    continue  # 自分の位置は既にカウント済み
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    if board[nz][ny][nx] == player:
-                        own_count += 1
-            
-            # 自分の石が2個以上あるラインをカウント
-            if own_count >= 2:
-                double_reach_lines += 1
-        
-        return double_reach_lines
+        self._load_board(board)
+        return self._count_double_reach(x + 4 * y + 16 * z, player)
     
     def count_opponent_double_reach_lines(self, board: Board, x: int, y: int, z: int, player: int) -> int:
         """指定位置に石を置いた時に、相手の石が2個以上あるアクセスライン数をカウント"""
-        opponent = 3 - player
-        opponent_double_reach_lines = 0
-        
-        # 相手の視点でアクセス可能な方向を取得
-        accessible_directions = self.get_accessible_directions(board, x, y, z, opponent)
-        
-        for dx, dy, dz in accessible_directions:
-            # 正方向の最大距離と障害物チェック
-            max_pos = 0
-            for i in range(1, 4):
-                nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 自分の石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != opponent:
-                        break
-                    max_pos = i
-                else:
-                    break
-            
-            # 負方向の最大距離と障害物チェック
-            max_neg = 0
-            for i in range(1, 4):
-                nx, ny, nz = x - i*dx, y - i*dy, z - i*dz
-                if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                    # 自分の石がある場合はラインを断ち切る
-                    if board[nz][ny][nx] != 0 and board[nz][ny][nx] != opponent:
-                        break
-                    max_neg = i
-                else:
-                    break
-            
-            # 合計で4つ以上並べるかチェック
-            if max_pos + max_neg + 1 >= 4:
-                # このライン上で相手の石をカウント
-                opponent_count = 0
-                for i in range(-max_neg, max_pos + 1):
-                    nx, ny, nz = x + i*dx, y + i*dy, z + i*dz
-                    if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                        if board[nz][ny][nx] == opponent:
-                            opponent_count += 1
-                
-                # 相手の石が2個以上あるラインをカウント
-                if opponent_count >= 2:
-                    opponent_double_reach_lines += 1
-        
-        return opponent_double_reach_lines
+        self._load_board(board)
+        return self._count_opponent_double_reach(x + 4 * y + 16 * z, player)
     
     def check_opponent_winning_moves_after_my_move(self, board: Board, x: int, y: int, z: int, player: int) -> int:
-        """指定位置に自分の石を置いた後、相手が勝利できる手の数をカウント（メモリ効率版）"""
-        opponent = 3 - player
-        winning_moves_count = 0
-        
-        # 仮想的に自分の石を置く（1箇所だけ変更）
-        original_value = board[z][y][x]
-        board[z][y][x] = player
-        
-        for opp_x in range(4):
-            for opp_y in range(4):
-                if self.can_place_stone(board, opp_x, opp_y):
-                    opp_z = self.get_height(board, opp_x, opp_y)
-                    
-                    # 仮想的に相手の石を置いてみる（1箇所だけ変更）
-                    original_opp_value = board[opp_z][opp_y][opp_x]
-                    board[opp_z][opp_y][opp_x] = opponent
-                    
-                    if self.check_win(board, opp_x, opp_y, opp_z, opponent):
-                        winning_moves_count += 1
-                    
-                    # 元に戻す
-                    board[opp_z][opp_y][opp_x] = original_opp_value
-        
-        # 元に戻す
-        board[z][y][x] = original_value
-        
-        return winning_moves_count
+        """指定位置に自分の石を置いた後、相手が勝利できる手の数をカウント"""
+        self._load_board(board)
+        return self._count_opponent_wins_after(x + 4 * y, player)
     
     def get_opponent_max_score_after_my_move(self, board: Board, x: int, y: int, z: int, player: int, depth: int = 0) -> int:
-        """指定位置に自分の石を置いた後、相手が得られる最大点数を取得（メモリ効率版）"""
-        opponent = 3 - player
-        max_score = -1
-        
-        # 仮想的に自分の石を置く（1箇所だけ変更）
-        original_value = board[z][y][x]
-        board[z][y][x] = player
-        
-        for opp_x in range(4):
-            for opp_y in range(4):
-                if self.can_place_stone(board, opp_x, opp_y):
-                    opp_z = self.get_height(board, opp_x, opp_y)
-                    score = self.evaluate_position(board, opp_x, opp_y, opp_z, opponent, depth)
-                    max_score = max(max_score, score)
-        
-        # 元に戻す
-        board[z][y][x] = original_value
-        
-        return max_score if max_score > -1 else 0
+        """指定位置に自分の石を置いた後、相手が得られる最大点数を取得"""
+        self._load_board(board)
+        return self._opponent_max_score_after(x + 4 * y, player, depth)
     
     def evaluate_position(self, board: Board, x: int, y: int, z: int, player: int, depth: int = 0) -> int:
-        """指定位置の重み（点数）を計算（メモリ効率版）"""
-        # キャッシュキーを生成（盤面の簡易ハッシュ）
-        cache_key = self._get_board_hash(board, x, y, z, player, depth)
-        
-        if cache_key in self._evaluation_cache:
-            self._cache_hits += 1
-            return self._evaluation_cache[cache_key]
-        
-        self._cache_misses += 1
-        score = 0
-        
-        # 再帰の深さ制限（2手先まで、メモリ効率を保ちつつ探索を維持）
-        if depth >= 2:
-            self._evaluation_cache[cache_key] = score
-            return score
-        
-        # depth別の重み設定
-        is_my_turn = (depth % 2 == 0)  # 自分の手（depth偶数）か相手の手（depth奇数）か
-        
-        # 減衰率の計算
-        decay_rate = 0.95 ** depth  # depth=0: 1.0, depth=1: 0.8
-        
-        # 1. アクセス可能なライン数による基本点
-        lines = self.count_potential_lines(board, x, y, z, player)
-        score += lines * 2 * decay_rate  # 1ライン = 2点 * 減衰率
-        
-        # 2. 方向別の石の数計算と重み付け
-        my_accessible, opponent_accessible, mixed = self.classify_directions(board, x, y, z, player)
-        
-        # 2-1. 自分のアクセスライン上の自分の石の数加点
-        my_stones = self.count_stones_in_directions(board, x, y, z, my_accessible, player)
-        if is_my_turn:
-            score += my_stones * 2 * decay_rate  # 自分の手: 自分の石1個 = 2点 * 減衰率
-        else:
-            score += my_stones * 2 * decay_rate  # 相手の手: 自分の石1個 = 2点 * 減衰率
-        
-        # 2-2. 相手のアクセスライン上の相手の石の数による段階的加点
-        opponent_stones = self.count_stones_in_directions(board, x, y, z, opponent_accessible, 3 - player)
-        if opponent_stones > 0:  # 相手の石のみ
-            # 1つ目は2点、2つ目は4点（合計6点）、3つ目は6点（合計12点）
-            for i in range(opponent_stones):
-                if is_my_turn:
-                    score += (i + 1) * 2 * decay_rate  # 自分の手: 段階的加点 * 減衰率
-                else:
-                    score += (i + 1) * 2 * decay_rate  # 相手の手: 段階的加点 * 減衰率
-        
-        # 2-3. 混在ライン上の石による加点・減点
-        mixed_my_stones = self.count_stones_in_directions(board, x, y, z, mixed, player)
-        mixed_opponent_stones = self.count_stones_in_directions(board, x, y, z, mixed, 3 - player)
-        
-        # 自分の石による加点
-        if mixed_my_stones > 0:
-            if is_my_turn:
-                score += mixed_my_stones * 2 * decay_rate  # 自分の手: 自分の石1個 = 2点加点 * 減衰率
-            else:
-                score += mixed_my_stones * 2 * decay_rate  # 相手の手: 自分の石1個 = 2点加点 * 減衰率
-        
-        # 相手の石による減点
-        if mixed_opponent_stones > 0:
-            if is_my_turn:
-                score -= mixed_opponent_stones * 2 * decay_rate  # 自分の手: 相手の石1個 = 2点減点 * 減衰率
-            else:
-                score -= mixed_opponent_stones * 2 * decay_rate  # 相手の手: 相手の石1個 = 2点減点 * 減衰率
-        
-        # 3. 角と中央の4マスの位置ボーナス
-        if (x == 0 or x == 3) and (y == 0 or y == 3):  # 角の4マス
-            if is_my_turn:
-                score += 2 * decay_rate  # 自分の手: 角 = 2点ボーナス * 減衰率
-            else:
-                score += 2 * decay_rate  # 相手の手: 角 = 2点ボーナス * 減衰率
-        elif (x == 1 or x == 2) and (y == 1 or y == 2):  # 中央の4マス
-            if is_my_turn:
-                score += 2 * decay_rate  # 自分の手: 中央 = 2点ボーナス * 減衰率
-            else:
-                score += 2 * decay_rate  # 相手の手: 中央 = 2点ボーナス * 減衰率
-        
-        # 4. ダブルリーチ報酬（自分の石が2個以上あるラインが複数ある場合）
-        double_reach_lines = self.count_double_reach_lines(board, x, y, z, player)
-        if double_reach_lines >= 2:  # 2個目以降は100点加点
-            for i in range(1, double_reach_lines):  # 2個目から計算
-                if is_my_turn:
-                    score += 100 * decay_rate  # 自分の手: 2個目以降=100点 * 減衰率
-                else:
-                    score += 100 * decay_rate   # 相手の手: 2個目以降=100点 * 減衰率
-        
-        # 5. ダブルリーチ妨害（相手の石が2個以上あるラインが複数ある場合）
-        opponent_double_reach_lines = self.count_opponent_double_reach_lines(board, x, y, z, player)
-        if opponent_double_reach_lines >= 2:  # 2個目以降は100点加点
-            for i in range(1, opponent_double_reach_lines):  # 2個目から計算
-                if is_my_turn:
-                    score += 100 * decay_rate  # 自分の手: 2個目以降=100点 * 減衰率
-                else:
-                    score += 100 * decay_rate   # 相手の手: 2個目以降=100点 * 減衰率
-        
-        # 6. 罠回避（統合版：勝利手と最大点数を100点換算で減点）
-        opponent_winning_moves = self.check_opponent_winning_moves_after_my_move(board, x, y, z, player)
-        
-        # 勝利手がある場合は大幅減点
-        if opponent_winning_moves > 0:
-            if is_my_turn:
-                score -= opponent_winning_moves * 100 * decay_rate  # 自分の手: 相手の勝利手1個 = 100点減点 * 減衰率
-            else:
-                score -= opponent_winning_moves * 100 * decay_rate   # 相手の手: 相手の勝利手1個 = 100点減点 * 減衰率
-        else:
-            # 再帰を避けるため、depth制限内でのみ最大点数を計算
-            if depth < 2:
-                opponent_max_score = self.get_opponent_max_score_after_my_move(board, x, y, z, player, depth + 1)
-                if is_my_turn:
-                    score -= opponent_max_score  * 0.9  # 自分の手: 相手の最大点数 * 0.5を減点 * 減衰率
-                else:
-                    score -= opponent_max_score  * 0.9  # 相手の手: 相手の最大点数 * 0.5を減点 * 減衰率
-        
-        # キャッシュに保存
-        self._evaluation_cache[cache_key] = score
-        return score
-    
-    def _get_board_hash(self, board: Board, x: int, y: int, z: int, player: int, depth: int) -> str:
-        """盤面の簡易ハッシュを生成（メモリ効率化のため）"""
-        # 重要な部分のみをハッシュ化（全盤面ではなく、周辺のみ）
-        hash_parts = []
-        
-        # 周辺3x3x3の範囲のみをハッシュ化
-        for dz in range(-1, 2):
-            for dy in range(-1, 2):
-                for dx in range(-1, 2):
-                    nx, ny, nz = x + dx, y + dy, z + dz
-                    if 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4:
-                        hash_parts.append(str(board[nz][ny][nx]))
-                    else:
-                        hash_parts.append('X')  # 範囲外
-        
-        return f"{player}_{depth}_{x}_{y}_{z}_{''.join(hash_parts)}"
+        """指定位置の重み（点数）を計算（z は get_height の値）"""
+        self._load_board(board)
+        return self._evaluate_cell(x + 4 * y, player, depth)
     
     def find_highest_line_access_move(self, board: Board, player: int):
         """最も高い重み（点数）の位置を探す"""
-        best_move = None
-        max_score = -1
+        return self.evaluate_all_positions(board, player)[1]
+    
+    def evaluate_all_positions(self, board: Board, player: int) -> Tuple[List[List[Optional[float]]], Optional[Tuple[int, int]], Dict[str, List[List[Optional[float]]]]]:
+        """全ての列の重み（点数）をまとめて計算する（各列の evaluate_position と同じ値）
         
-        for x in range(4):
-            for y in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    score = self.evaluate_position(board, x, y, z, player, 0)
-                    
-                    if score > max_score:
-                        max_score = score
-                        best_move = (x, y)
+        (4x4の点数 [y][x], 最も高い重み（点数）の手, 特徴量の名前 -> 4x4の値 [y][x]) を返す（満杯の列は None）
+        """
+        self._load_board(board)
+        scores, breakdown = self._evaluate_root(player)
+        best_col = self._highest_score_column(scores)
+        best_move = self._column_to_move(best_col) if best_col is not None else None
+        
+        def to_grid(values):
+            return [[values[x + 4 * y] for x in range(4)] for y in range(4)]
         
-        return best_move
+        return to_grid(scores), best_move, {name: to_grid(values) for name, values in breakdown.items()}
     
     def print_opponent_interference(self, board: Board, player: int) -> None:
         """各マスで妨害できる相手の石数を表示"""
@@ -873,25 +914,38 @@ class MyAI(Alg3D):
                     print(" .", end=" ")
             print()
     
+    def get_pending_threats(self, board: Board, player: int) -> List[Tuple[int, int, int]]:
+        """player が石を置けば勝てるが、下が空いていてまだ置けないマスを (x, y, z) で返す"""
+        self._load_board(board)
+        threats = self._pending_threat_cells(player)
+        return [(cell & 3, (cell >> 2) & 3, cell >> 4) for cell in range(64) if threats >> cell & 1]
+    
+    def get_zugzwang_winner(self, board: Board) -> int:
+        """段の偶奇から、盤面が埋まっていくと脅威の下に置かされて負ける側を判定し、勝つ側を返す（不明なら0）"""
+        self._load_board(board)
+        return self._zugzwang_winner()
+    
+    def print_parity_analysis(self, board: Board) -> None:
+        """両プレイヤーの保留中の脅威マスと段の偶奇、ツークツワンクの判定を表示"""
+        print("\n⚖️ 保留中の脅威（段＝z+1、先手は奇数段・後手は偶数段が有利）:")
+        for player in (1, 2):
+            threats = self.get_pending_threats(board, player)
+            cells = [f"({x},{y},{z}) {z + 1}段目{'◎' if (z % 2 == 0) == (player == 1) else '×'}" for x, y, z in threats]
+            print(f"  プレイヤー{player}: {', '.join(cells) if cells else 'なし'}")
+        winner = self.get_zugzwang_winner(board)
+        print(f"  判定: {f'プレイヤー{winner}がツークツワンクで有利' if winner else '不明'}")
+    
     def find_winning_move(self, board: Board, player: int):
-        """勝利できる手を探す（メモリ効率版）"""
-        for x in range(4):
-            for y in range(4):
-                if self.can_place_stone(board, x, y):
-                    z = self.get_height(board, x, y)
-                    
-                    # 仮想的に石を置いてみる（1箇所だけ変更）
-                    original_value = board[z][y][x]
-                    board[z][y][x] = player
-                    
-                    if self.check_win(board, x, y, z, player):
-                        # 元に戻す
-                        board[z][y][x] = original_value
-                        return (x, y)
-                    
-                    # 元に戻す
-                    board[z][y][x] = original_value
-        return None
+        """勝利できる手を探す"""
+        self._load_board(board)
+        win_col = self._find_winning_column(player)
+        return self._column_to_move(win_col) if win_col is not None else None
+    
+    def find_safe_move(self, board: Board, player: int):
+        """探索せずに決まる安全な手（勝ち・防御・相手の脅威マスの真下を避ける）"""
+        self._load_board(board)
+        safe_col = self._find_safe_column(player)
+        return self._column_to_move(safe_col) if safe_col is not None else None
     
     def find_center_move(self, board: Board):
         """中央付近の空いている位置を探す"""
@@ -923,39 +977,1437 @@ class MyAI(Alg3D):
     
     def check_win(self, board: Board, x: int, y: int, z: int, player: int):
         """指定位置で勝利条件を満たしているかチェック"""
-        # 6方向の直線をチェック
-        directions = [
-            (1, 0, 0),   # x軸方向
-            (0, 1, 0),   # y軸方向
-            (0, 0, 1),   # z軸方向
-            (1, 1, 0),   # xy対角線
-            (1, 0, 1),   # xz対角線
-            (0, 1, 1),   # yz対角線
-            (1, 1, 1),   # xyz対角線
-            (1, -1, 0),  # xy逆対角線
-            (1, 0, -1),  # xz逆対角線
-            (0, 1, -1),  # yz逆対角線
-            (1, -1, -1), # xyz逆対角線
-            (1, 1, -1),  # xy正、z負対角線
-            (1, -1, 1),  # xy負、z正対角線
+        for line in _CELL_LINES[x + 4 * y + 16 * z]:
+            if all(board[c >> 4][(c >> 2) & 3][c & 3] == player for c in _LINE_CELLS[line]):
+                return True
+        return False
+    
+    # === ビットボード ===
+    
+    def _load_board(self, board: Board) -> None:
+        """Board からビットボード（プレイヤー別の64bit整数）と列の高さ配列を構築"""
+        bits = [0, 0, 0]
+        heights = [4] * 16
+        for z in range(3, -1, -1):
+            layer = board[z]
+            for y in range(4):
+                row = layer[y]
+                for x in range(4):
+                    value = row[x]
+                    if value:
+                        bits[value] |= 1 << (x + 4 * y + 16 * z)
+                    else:
+                        heights[x + 4 * y] = z  # 下から見て最初の空きマス
+        self._bits = bits
+        self._heights = heights
+        self._line_counts = [
+            None,
+            [_popcount(bits[1] & mask) for mask in _LINE_MASKS],
+            [_popcount(bits[2] & mask) for mask in _LINE_MASKS],
         ]
-        
-        for dx, dy, dz in directions:
+        self._threat_counts = [None, [0] * 64, [0] * 64]
+        self._threats = [0, 0, 0]
+        for player in (1, 2):
+            threat_counts = self._threat_counts[player]
+            for line, count in enumerate(self._line_counts[player]):
+                if count == 3:
+                    missing = _LINE_MASKS[line] & ~bits[player]
+                    threat_counts[missing.bit_length() - 1] += 1
+                    self._threats[player] |= missing
+        self._line_score = sum(
+            _LINE_WEIGHTS[count1] if not count2 else -_LINE_WEIGHTS[count2] if not count1 else 0
+            for count1, count2 in zip(self._line_counts[1], self._line_counts[2])
+        )
+        hashes = [0] * _NUM_SYMMETRIES
+        for player in (1, 2):
+            for cell in range(64):
+                if (bits[player] >> cell) & 1:
+                    keys = _ZOBRIST_SYMMETRIC[player][cell]
+                    for s in range(_NUM_SYMMETRIES):
+                        hashes[s] ^= keys[s]
+        self._hashes = hashes
+    
+    def _make_move(self, col: int, player: int) -> int:
+        """列 col に player の石を落とし、置いたセル番号を返す（ライン別の石数と静的評価も更新）"""
+        z = self._heights[col]
+        cell = col + 16 * z
+        self._bits[player] |= 1 << cell
+        self._heights[col] = z + 1
+        hashes = self._hashes
+        keys = _ZOBRIST_SYMMETRIC[player][cell]
+        for s in range(_NUM_SYMMETRIES):
+            hashes[s] ^= keys[s]
+        counts = self._line_counts[player]
+        opponent_counts = self._line_counts[3 - player]
+        deltas = _LINE_SCORE_DELTAS[player]
+        own_bits = self._bits[player]
+        line_score = self._line_score
+        for line in _CELL_LINES[cell]:
+            count = counts[line]
+            line_score += deltas[count][opponent_counts[line]]
+            count += 1
+            counts[line] = count
+            if count == 3:
+                # ラインの残り1マスが新しい脅威マスになる
+                missing = _LINE_MASKS[line] & ~own_bits
+                threat_counts = self._threat_counts[player]
+                missing_cell = missing.bit_length() - 1
+                threat_counts[missing_cell] += 1
+                if threat_counts[missing_cell] == 1:
+                    self._threats[player] |= missing
+        self._line_score = line_score
+        return cell
+    
+    def _unmake_move(self, col: int, player: int) -> None:
+        """列 col の一番上にある player の石を取り除く（ライン別の石数と静的評価も戻す）"""
+        z = self._heights[col] - 1
+        cell = col + 16 * z
+        self._heights[col] = z
+        own_bits = self._bits[player]
+        self._bits[player] = own_bits ^ (1 << cell)
+        hashes = self._hashes
+        keys = _ZOBRIST_SYMMETRIC[player][cell]
+        for s in range(_NUM_SYMMETRIES):
+            hashes[s] ^= keys[s]
+        counts = self._line_counts[player]
+        opponent_counts = self._line_counts[3 - player]
+        deltas = _LINE_SCORE_DELTAS[player]
+        line_score = self._line_score
+        for line in _CELL_LINES[cell]:
+            count = counts[line] - 1
+            counts[line] = count
+            line_score -= deltas[count][opponent_counts[line]]
+            if count == 2:
+                # このラインによる脅威マスを取り消す
+                missing = _LINE_MASKS[line] & ~own_bits
+                threat_counts = self._threat_counts[player]
+                missing_cell = missing.bit_length() - 1
+                threat_counts[missing_cell] -= 1
+                if not threat_counts[missing_cell]:
+                    self._threats[player] &= ~missing
+        self._line_score = line_score
+    
+    def _canonical_hash(self) -> Tuple[int, int]:
+        """対称な8局面のうちキーが最小のもの（標準形）の (キー, 対称変換の番号) を返す"""
+        hashes = self._hashes
+        key = min(hashes)
+        return key, hashes.index(key)
+    
+    def _canonical_position(self) -> Tuple[int, int, int]:
+        """8通りの対称形のうち (プレイヤー1の石, プレイヤー2の石) が辞書順最小のものと、その対称変換の番号"""
+        bits1, bits2 = self._bits[1], self._bits[2]
+        best_form, best_symmetry = (bits1, bits2), 0
+        for symmetry in range(1, _NUM_SYMMETRIES):
+            mapping = _SYMMETRY_COLS[symmetry]
+            form = (_transform_bits(bits1, mapping), _transform_bits(bits2, mapping))
+            if form < best_form:
+                best_form, best_symmetry = form, symmetry
+        return best_form[0], best_form[1], best_symmetry
+    
+    def _opening_book_key(self) -> Tuple[str, int]:
+        """定跡表のキー（標準形の石の並び）と、その対称変換の番号"""
+        bits1, bits2, symmetry = self._canonical_position()
+        parts = []
+        for bits in (bits1, bits2):
+            parts.append("".join(_BOOK_ALPHABET[cell] for cell in range(64) if (bits >> cell) & 1))
+        return "/".join(parts), symmetry
+    
+    def _find_opening_book_column(self) -> Optional[int]:
+        """定跡表にある局面なら、その手を元の向きの列番号で返す"""
+        if _popcount(self._bits[1] | self._bits[2]) > _OPENING_BOOK_MAX_STONES:
+            return None
+        key, symmetry = self._opening_book_key()
+        book_col = _OPENING_BOOK.get(key)
+        if book_col is None:
+            return None
+        col = _SYMMETRY_INVERSE_COLS[symmetry][book_col]
+        return col if self._heights[col] < 4 else None
+    
+    def _is_winning_cell(self, cell: int, player: int) -> bool:
+        """空きマス cell に player の石を置くと4つ並ぶか（脅威マスのビットで判定）"""
+        return bool(self._threats[player] >> cell & 1)
+    
+    def _column_to_move(self, col: int) -> Tuple[int, int]:
+        """列番号を (x, y) に変換"""
+        return (col & 3, col >> 2)
+    
+    def _find_winning_column(self, player: int) -> Optional[int]:
+        """player が石を置くと勝利できる列を返す（なければ None）"""
+        heights = self._heights
+        for col in _SCAN_ORDER:
+            z = heights[col]
+            if z < 4 and self._is_winning_cell(col + 16 * z, player):
+                return col
+        return None
+    
+    def _find_safe_column(self, player: int) -> Optional[int]:
+        """勝てる列、塞ぐべき列、なければ自爆しない列のうち通るラインが最も多いものを返す
+        
+        相手の脅威マスの真下は相手に勝たれるので最後、自分の脅威マスの真下は塞がれるのでその前に回す
+        """
+        win_col = self._find_winning_column(player)
+        if win_col is not None:
+            return win_col
+        opponent = 3 - player
+        block_col = self._find_winning_column(opponent)
+        if block_col is not None:
+            return block_col
+        heights = self._heights
+        own_threats = self._threats[player]
+        opponent_threats = self._threats[opponent]
+        best_col = None
+        best_key = None
+        for col in _SCAN_ORDER:
+            z = heights[col]
+            if z < 4:
+                cell = col + 16 * z
+                key = (
+                    not opponent_threats >> (cell + 16) & 1,
+                    not own_threats >> (cell + 16) & 1,
+                    len(_CELL_LINES[cell]),
+                )
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best_col = col
+        return best_col
+    
+    def _find_highest_score_column(self, player: int) -> Optional[int]:
+        """評価点が最も高い列を返す"""
+        return self._highest_score_column(self._evaluate_root(player)[0])
+    
+    @staticmethod
+    def _highest_score_column(scores: List[Optional[float]]) -> Optional[int]:
+        """列ごとの評価点から、最も高い列を返す（同点は走査順で先の列、-1 以下しかなければ None）"""
+        best_col = None
+        max_score = -1
+        for col in _SCAN_ORDER:
+            score = scores[col]
+            if score is not None:
+                if score > max_score:
+                    max_score = score
+                    best_col = col
+        return best_col
+    
+    def _accessible_lines(self, cell: int, player: int) -> List[int]:
+        """cell を通る勝利ラインのうち、相手の石がない（4つ並べられる）ライン番号"""
+        opponent_counts = self._line_counts[3 - player]
+        return [line for line in _CELL_LINES[cell] if opponent_counts[line] == 0]
+    
+    def _classify_cell(self, cell: int, player: int) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]], List[Tuple[int, int, int]]]:
+        """cell を通る勝利ラインを、自分のアクセスライン・相手のアクセスライン・混在ラインの方向に分類"""
+        # 相手の石を含むラインは4つ並べられないため、分類されるのは自分のアクセスライン（空を含む）のみ
+        my_accessible_directions = [_LINE_DIRECTIONS[line] for line in self._accessible_lines(cell, player)]
+        return my_accessible_directions, [], []
+    
+    def _count_stones_on_lines(self, cell: int, lines: List[int], target_player: int) -> int:
+        """指定ライン上（空きマス cell 自身を除く）にある target_player の石の数"""
+        counts = self._line_counts[target_player]
+        stone_count = 0
+        for line in lines:
+            stone_count += counts[line]
+        return stone_count
+    
+    def _count_stones_on_rays(self, cell: int, directions: List[Tuple[int, int, int]], target_player: int) -> int:
+        """cell から見た指定方向の直線上にある target_player の石の数（4マスに満たない方向も含む）"""
+        rays = _CELL_RAYS[cell]
+        target_bits = self._bits[target_player]
+        stone_count = 0
+        for direction in directions:
+            stone_count += _popcount(target_bits & rays[_DIRECTION_INDEX[direction]][2])
+        return stone_count
+    
+    def _count_accessible_runs(self, cell: int, player: int) -> int:
+        """cell に石を置いた時、自分の石が2つ以上連続する方向の数"""
+        own_bits = self._bits[player]
+        accessible_lines = 0
+        for pos, neg, _ in _CELL_RAYS[cell]:
             count = 1  # 現在の石を含む
+            for side in (pos, neg):
+                for other in side:
+                    if not (own_bits >> other) & 1:
+                        break
+                    count += 1
+            if count >= 2:  # 2つ以上並んでいるライン
+                accessible_lines += 1
+        return accessible_lines
+    
+    def _count_opponent_stones_on_lines(self, cell: int, player: int) -> int:
+        """cell を通る自分のアクセスライン上の相手の石の数"""
+        return self._count_stones_on_lines(cell, self._accessible_lines(cell, player), 3 - player)
+    
+    def _count_own_weighted(self, cell: int, player: int) -> int:
+        """cell を通る自分のアクセスライン上の自分の石を、距離1=3点・距離2=2点・距離3=1点で合計"""
+        own_bits = self._bits[player]
+        weighted_score = 0
+        for line in self._accessible_lines(cell, player):
+            cells = _LINE_CELLS[line]
+            index = cells.index(cell)
+            for i, other in enumerate(cells):
+                if other != cell and (own_bits >> other) & 1:
+                    weighted_score += 4 - abs(i - index)
+        return weighted_score
+    
+    def _count_double_reach(self, cell: int, player: int) -> int:
+        """cell に置くと自分の石が2個以上になるアクセスライン数"""
+        own_counts = self._line_counts[player]
+        opponent_counts = self._line_counts[3 - player]
+        double_reach_lines = 0
+        for line in _CELL_LINES[cell]:
+            if own_counts[line] and not opponent_counts[line]:
+                double_reach_lines += 1
+        return double_reach_lines
+    
+    def _count_opponent_double_reach(self, cell: int, player: int) -> int:
+        """cell を通る相手のアクセスラインのうち、相手の石が2個以上あるライン数"""
+        own_counts = self._line_counts[player]
+        opponent_counts = self._line_counts[3 - player]
+        opponent_double_reach_lines = 0
+        for line in _CELL_LINES[cell]:
+            if opponent_counts[line] >= 2 and not own_counts[line]:
+                opponent_double_reach_lines += 1
+        return opponent_double_reach_lines
+    
+    def _count_opponent_wins_after(self, col: int, player: int) -> int:
+        """列 col に自分の石を置いた後、相手が勝利できる手の数"""
+        opponent = 3 - player
+        winning_moves_count = 0
+        heights = self._heights
+        
+        self._make_move(col, player)
+        for opp_col in _SCAN_ORDER:
+            opp_z = heights[opp_col]
+            if opp_z < 4 and self._is_winning_cell(opp_col + 16 * opp_z, opponent):
+                winning_moves_count += 1
+        self._unmake_move(col, player)
+        
+        return winning_moves_count
+    
+    def _opponent_max_score_after(self, col: int, player: int, depth: int) -> int:
+        """列 col に自分の石を置いた後、相手が得られる最大点数"""
+        opponent = 3 - player
+        max_score = -1
+        heights = self._heights
+        
+        self._make_move(col, player)
+        for opp_col in _SCAN_ORDER:
+            if heights[opp_col] < 4:
+                score = self._evaluate_cell(opp_col, opponent, depth)
+                max_score = max(max_score, score)
+        self._unmake_move(col, player)
+        
+        return max_score if max_score > -1 else 0
+    
+    def _cell_features(self, col: int, player: int) -> Tuple[int, int, int, int, int]:
+        """列 col に石を落とした時の評価の特徴量を、cell を通るラインを1回ずつ見るだけで求める
+        
+        (アクセスライン数, アクセスライン上の自分の石数, ダブルリーチのライン数,
+         相手のダブルリーチのライン数, 置いた後に相手が勝利できる手の数) を返す
+        """
+        cell = col + 16 * self._heights[col]
+        opponent = 3 - player
+        own_counts = self._line_counts[player]
+        opponent_counts = self._line_counts[opponent]
+        lines = 0
+        own_stones = 0
+        double_reach_lines = 0
+        opponent_double_reach_lines = 0
+        for line in _CELL_LINES[cell]:
+            opponent_count = opponent_counts[line]
+            if opponent_count:
+                if opponent_count >= 2 and not own_counts[line]:
+                    opponent_double_reach_lines += 1
+            else:
+                own = own_counts[line]
+                lines += 1
+                own_stones += own
+                if own:
+                    double_reach_lines += 1
+        
+        # 置いた後は cell が埋まり、その真上に置けるようになる（自分の石で相手の脅威マスは増えない）
+        playable = (self._playable_cells() & ~(1 << cell)) | ((1 << (cell + 16)) & _BOARD_BITS)
+        opponent_winning_moves = _popcount(self._threats[opponent] & playable)
+        return lines, own_stones, double_reach_lines, opponent_double_reach_lines, opponent_winning_moves
+    
+    @staticmethod
+    def _cell_base_score(col: int, lines: int, my_stones: int, double_reach_lines: int,
+                         opponent_double_reach_lines: int, decay_rate: float) -> float:
+        """重み（点数）のうち、置いた後の相手の手に依らない部分（評価の1.〜5.）"""
+        x, y = col & 3, col >> 2
+        score = 0
+        
+        # 1. アクセス可能なライン数による基本点
+        score += lines * 2 * decay_rate  # 1ライン = 2点 * 減衰率
+        
+        # 2. 自分のアクセスライン上の自分の石の数加点
+        # （相手の石を含むラインはアクセスできないため、相手のアクセスラインと混在ラインの石による加点・減点は常に0）
+        score += my_stones * 2 * decay_rate  # 自分の石1個 = 2点 * 減衰率
+        
+        # 3. 角と中央の4マスの位置ボーナス
+        if (x == 0 or x == 3) and (y == 0 or y == 3):  # 角の4マス
+            score += 2 * decay_rate  # 角 = 2点ボーナス * 減衰率
+        elif (x == 1 or x == 2) and (y == 1 or y == 2):  # 中央の4マス
+            score += 2 * decay_rate  # 中央 = 2点ボーナス * 減衰率
+        
+        # 4. ダブルリーチ報酬（自分の石が2個以上あるラインが複数ある場合）
+        # 浮動小数点の丸めを従来と揃えるため、掛け算にせず1本ずつ加算する
+        for i in range(1, double_reach_lines):  # 2個目以降=100点 * 減衰率
+            score += 100 * decay_rate
+        
+        # 5. ダブルリーチ妨害（相手の石が2個以上あるラインが複数ある場合）
+        for i in range(1, opponent_double_reach_lines):  # 2個目以降=100点 * 減衰率
+            score += 100 * decay_rate
+        return score
+    
+    def _evaluate_cell(self, col: int, player: int, depth: int) -> int:
+        """列 col に石を落とした時の重み（点数）をビットボード上で計算"""
+        # 再帰の深さ制限（2手先まで、メモリ効率を保ちつつ探索を維持）
+        if depth >= 2:
+            return 0
+        
+        # 減衰率の計算
+        decay_rate = 0.95 ** depth  # depth=0: 1.0, depth=1: 0.8
+        
+        # cell を通るラインを1回ずつ見て、全ての特徴量をまとめて求める
+        lines, my_stones, double_reach_lines, opponent_double_reach_lines, opponent_winning_moves = \
+            self._cell_features(col, player)
+        score = self._cell_base_score(col, lines, my_stones, double_reach_lines, opponent_double_reach_lines, decay_rate)
+        
+        # 6. 罠回避（統合版：勝利手と最大点数を100点換算で減点）
+        if opponent_winning_moves > 0:
+            score -= opponent_winning_moves * 100 * decay_rate  # 相手の勝利手1個 = 100点減点 * 減衰率
+        elif depth < 2:
+            # 再帰を避けるため、depth制限内でのみ最大点数を計算
+            opponent_max_score = self._opponent_max_score_after(col, player, depth + 1)
+            score -= opponent_max_score  * 0.9  # 相手の最大点数 * 0.9を減点
+        
+        return score
+    
+    def _line_feature_maps(self, player: int) -> Tuple[List[int], List[int], List[int], List[int]]:
+        """全ラインを1回ずつ見て、各マスに player が置いた時の特徴量をセル番号で引くリストにまとめる
+        
+        (アクセスライン数, アクセスライン上の自分の石数, ダブルリーチのライン数, 相手のダブルリーチのライン数)
+        を返す（_cell_features の最初の4つと同じ値、埋まっているマスの値は使わない）
+        """
+        own_counts = self._line_counts[player]
+        opponent_counts = self._line_counts[3 - player]
+        lines = [0] * 64
+        own_stones = [0] * 64
+        double_reach_lines = [0] * 64
+        opponent_double_reach_lines = [0] * 64
+        for line in range(_NUM_LINES):
+            cells = _LINE_CELLS[line]
+            opponent_count = opponent_counts[line]
+            if opponent_count:
+                if opponent_count >= 2 and not own_counts[line]:
+                    for cell in cells:
+                        opponent_double_reach_lines[cell] += 1
+            else:
+                own = own_counts[line]
+                for cell in cells:
+                    lines[cell] += 1
+                    own_stones[cell] += own
+                if own:
+                    for cell in cells:
+                        double_reach_lines[cell] += 1
+        return lines, own_stones, double_reach_lines, opponent_double_reach_lines
+    
+    def _evaluate_root(self, player: int) -> Tuple[List[Optional[float]], Dict[str, List[Optional[float]]]]:
+        """全ての列の重み（点数）を _evaluate_cell(col, player, 0) と同じ値でまとめて計算する
+        
+        ラインごとの特徴量は両方のプレイヤーについて1回だけ求めて各マスに配り、自分の石を置いた後の
+        相手の評価は、その石を通るラインの上のマスだけを差分で直す。
+        (列番号 -> 点数, 内訳の名前 -> 列番号 -> 値) を返す（満杯の列は None）
+        """
+        opponent = 3 - player
+        heights = self._heights
+        own_counts = self._line_counts[player]
+        opponent_counts = self._line_counts[opponent]
+        my_lines, my_stones, my_double, my_opponent_double = self._line_feature_maps(player)
+        opp_lines, opp_stones, opp_double, opp_opponent_double = self._line_feature_maps(opponent)
+        playable = self._playable_cells()
+        scores = [None] * 16
+        breakdown = {name: [None] * 16 for name in _ROOT_FEATURES}
+        for col in _SCAN_ORDER:
+            z = heights[col]
+            if z >= 4:
+                continue
+            cell = col + 16 * z
+            x, y = col & 3, col >> 2
+            after = (playable & ~(1 << cell)) | ((1 << (cell + 16)) & _BOARD_BITS)
+            opponent_winning_moves = _popcount(self._threats[opponent] & after)
+            score = self._cell_base_score(col, my_lines[cell], my_stones[cell], my_double[cell],
+                                          my_opponent_double[cell], 1.0)
+            opponent_max_score = None
+            if opponent_winning_moves > 0:
+                score -= opponent_winning_moves * 100 * 1.0  # 相手の勝利手1個 = 100点減点
+            else:
+                # 自分の石で変わるのは cell を通るラインだけなので、その上の相手の置けるマスの特徴量を直す
+                deltas = {}
+                for line in _CELL_LINES[cell]:
+                    mine = own_counts[line]
+                    theirs = opponent_counts[line]
+                    if not mine:
+                        delta = (-1, -theirs, -1 if theirs else 0, 0)  # 相手のアクセスラインでなくなる
+                    elif mine == 1 and not theirs:
+                        delta = (0, 0, 0, 1)  # 相手から見て、こちらの石が2個のラインになる
+                    else:
+                        continue
+                    for other in _LINE_CELLS[line]:
+                        if other != cell and after >> other & 1:
+                            current = deltas.get(other, (0, 0, 0, 0))
+                            deltas[other] = tuple(a + b for a, b in zip(current, delta))
+                
+                # 相手の各手の評価（depth=1、さらに先の相手の最大点数は常に0）の最大値
+                self._make_move(col, player)
+                my_threats = self._threats[player]
+                max_score = -1
+                for opp_col in _SCAN_ORDER:
+                    opp_z = heights[opp_col]
+                    if opp_z >= 4:
+                        continue
+                    opp_cell = opp_col + 16 * opp_z
+                    d_lines, d_stones, d_double, d_opponent_double = deltas.get(opp_cell, (0, 0, 0, 0))
+                    opp_score = self._cell_base_score(
+                        opp_col, opp_lines[opp_cell] + d_lines, opp_stones[opp_cell] + d_stones,
+                        opp_double[opp_cell] + d_double, opp_opponent_double[opp_cell] + d_opponent_double, 0.95,
+                    )
+                    opp_after = (after & ~(1 << opp_cell)) | ((1 << (opp_cell + 16)) & _BOARD_BITS)
+                    my_winning_moves = _popcount(my_threats & opp_after)
+                    if my_winning_moves > 0:
+                        opp_score -= my_winning_moves * 100 * 0.95
+                    max_score = max(max_score, opp_score)
+                self._unmake_move(col, player)
+                opponent_max_score = max_score if max_score > -1 else 0
+                score -= opponent_max_score * 0.9  # 相手の最大点数 * 0.9を減点
             
-            # 正方向にカウント
-            nx, ny, nz = x + dx, y + dy, z + dz
-            while 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4 and board[nz][ny][nx] == player:
-                count += 1
-                nx, ny, nz = nx + dx, ny + dy, nz + dz
-            
-            # 負方向にカウント
-            nx, ny, nz = x - dx, y - dy, z - dz
-            while 0 <= nx < 4 and 0 <= ny < 4 and 0 <= nz < 4 and board[nz][ny][nx] == player:
+            scores[col] = score
+            breakdown["lines"][col] = my_lines[cell]
+            breakdown["own_stones"][col] = my_stones[cell]
+            breakdown["position_bonus"][col] = 2 if (x in (0, 3)) == (y in (0, 3)) else 0
+            breakdown["double_reach"][col] = my_double[cell]
+            breakdown["opponent_double_reach"][col] = my_opponent_double[cell]
+            breakdown["opponent_wins"][col] = opponent_winning_moves
+            breakdown["opponent_max_score"][col] = opponent_max_score
+        return scores, breakdown
+    
+    # === パリティ解析（重力で置けない脅威マスを、どちらが埋めることになるか） ===
+    
+    def _threat_cells(self, player: int) -> int:
+        """player が石を置けば4つ並ぶ空きマスのビット（置けるかどうかは問わない）"""
+        return self._threats[player] & ~(self._bits[1] | self._bits[2])
+    
+    def _playable_cells(self) -> int:
+        """各列で次に石が落ちるマスのビット"""
+        heights = self._heights
+        playable = 0
+        for col in range(16):
+            if heights[col] < 4:
+                playable |= 1 << (col + 16 * heights[col])
+        return playable
+    
+    def _pending_threat_cells(self, player: int) -> int:
+        """player の脅威マスのうち、下が空いていてまだ置けないもののビット"""
+        return self._threat_cells(player) & ~self._playable_cells()
+    
+    @staticmethod
+    def _parity_threats(threats1: int, threats2: int) -> Tuple[int, int]:
+        """段の偶奇が持ち主に有利な脅威マスのうち、各列で一番下にあるもののビットを (先手, 後手) で返す
+        
+        不利な段の脅威は相手に先に埋められるので数えない。
+        同じ列でより下に相手の有利な脅威があると、そちらで先に勝負が決まるため数えない。
+        """
+        good1 = threats1 & _PARITY_CELLS[1]
+        good2 = threats2 & _PARITY_CELLS[2]
+        good = good1 | good2
+        below = ((good << 16) | (good << 32) | (good << 48)) & _BOARD_BITS
+        lowest = good & ~below
+        return lowest & good1, lowest & good2
+    
+    @staticmethod
+    def _parity_verdict(good1: int, good2: int) -> int:
+        """有利な段の脅威を片方だけが持っていれば、その側が最後にツークツワンクで勝つ（不明なら0）"""
+        if good1 and not good2:
+            return 1
+        if good2 and not good1:
+            return 2
+        return 0
+    
+    def _zugzwang_winner(self) -> int:
+        """現在の盤面のツークツワンクの判定（_parity_verdict を参照）"""
+        playable = self._playable_cells()
+        good1, good2 = self._parity_threats(
+            self._threat_cells(1) & ~playable, self._threat_cells(2) & ~playable)
+        return self._parity_verdict(good1, good2)
+    
+    # === 時間管理 ===
+    
+    def _allocate_time(self) -> float:
+        """この手の探索に使うCPU秒数を、空きマスの数と局面の緊迫度から決める
+        
+        search_time を基準に、序盤は減らし、脅威マスが多い局面では増やす。
+        本番の上限から安全マージンを引いた時間を超えない（search_time 自体がそれより長い場合を除く）。
+        """
+        occupied = self._bits[1] | self._bits[2]
+        budget = self.search_time
+        if _popcount(occupied) < _OPENING_STONES:
+            budget *= _OPENING_TIME_RATIO
+        budget *= min(_MAX_CRITICAL_TIME_RATIO, 1.0 + _CRITICAL_TIME_RATIO * self._tactical_density())
+        return min(budget, max(self.search_time, _CPU_TIME_LIMIT - _TIME_SAFETY_MARGIN))
+    
+    # === 探索（反復深化αβ） ===
+    
+    def _save_state(self):
+        """探索中断時に戻せるよう、ビットボードの状態を保存"""
+        return (
+            self._bits[:],
+            self._heights[:],
+            [None, self._line_counts[1][:], self._line_counts[2][:]],
+            self._hashes[:],
+            [None, self._threat_counts[1][:], self._threat_counts[2][:]],
+            self._threats[:],
+            self._line_score,
+        )
+    
+    def _restore_state(self, state) -> None:
+        """_save_state で保存した状態に戻す"""
+        bits, heights, line_counts, hashes, threat_counts, threats, line_score = state
+        # 新しいリストを作らず、今のリストに値を書き戻す
+        self._bits[:] = bits
+        self._heights[:] = heights
+        self._line_counts[1][:] = line_counts[1]
+        self._line_counts[2][:] = line_counts[2]
+        self._hashes[:] = hashes
+        self._threat_counts[1][:] = threat_counts[1]
+        self._threat_counts[2][:] = threat_counts[2]
+        self._threats[:] = threats
+        self._line_score = line_score
+    
+    def _static_evaluation(self, player: int) -> int:
+        """player 視点の盤面全体の静的評価
+        
+        片方の石だけのラインを石数で重み付けした値（make/unmake で差分更新済み）に、
+        脅威マスの段の偶奇（パリティ解析）を加える。
+        探索の末端ではどちらにもすぐ置ける脅威はないため、脅威マスはすべて保留中のもの。
+        """
+        opponent = 3 - player
+        score = self._line_score if player == 1 else -self._line_score
+        
+        threats = self._threats
+        if threats[1] or threats[2]:
+            empty = ~(self._bits[1] | self._bits[2])
+            good = (0,) + self._parity_threats(threats[1] & empty, threats[2] & empty)
+            score += (_popcount(good[player]) - _popcount(good[opponent])) * _PARITY_THREAT_SCORE
+            winner = self._parity_verdict(good[1], good[2])
+            if winner == player:
+                score += _ZUGZWANG_SCORE
+            elif winner == opponent:
+                score -= _ZUGZWANG_SCORE
+        return score
+    
+    def _search_best_column(self, player: int, time_limit: float, excluded_cols: Tuple[int, ...] = ()) -> Optional[int]:
+        """反復深化αβ探索で最善の列を返す（制限時間内に読み切った最後の深さの結果）
+        
+        excluded_cols は負けが確定している列で、他に手があれば探索しない
+        """
+        heights = self._heights
+        moves = [col for col in _SCAN_ORDER if heights[col] < 4]
+        if not moves:
+            return None
+        safe_moves = [col for col in moves if col not in excluded_cols]
+        if safe_moves:
+            moves = safe_moves
+        
+        # 既存の重み（点数）の高い順に並べ、最初の反復の手順とする
+        move_scores = self._evaluate_root(player)[0]
+        moves.sort(key=lambda col: -move_scores[col])
+        
+        # 前回の読み筋の続きがあれば、その手から試す
+        resume_depth, pv = self._resume_depth, self._pv
+        self._resume_depth, self._pv, self._predicted_key = 1, [], None
+        if pv and pv[0] in moves:
+            moves.remove(pv[0])
+            moves.insert(0, pv[0])
+        
+        self._set_limits(time_limit)
+        self._search_depth = 0
+        self._reset_move_ordering()
+        best_col = moves[0]
+        if len(moves) == 1:
+            return best_col
+        # 最初の深さも読み切れなかった場合は、自爆しない手を返す
+        safe_col = self._find_safe_column(player)
+        if safe_col in moves:
+            best_col = safe_col
+        
+        state = self._save_state()
+        self._root_stones = _popcount(self._bits[1] | self._bits[2])
+        empty_cells = 64 - self._root_stones
+        for depth in range(min(resume_depth, empty_cells), empty_cells + 1):
+            start_nodes = self._nodes
+            try:
+                score, col = self._search_aspiration(moves, depth, player)
+            except _SearchTimeout:
+                self._restore_state(state)
+                break
+            self._depth_nodes.append(self._nodes - start_nodes)
+            best_col = col
+            self._best_move_so_far = self._column_to_move(col)
+            self._search_depth = depth
+            self._search_score = score
+            self._search_best = col
+            # 前回の最善手を先頭にして次の深さを探索
+            moves.remove(col)
+            moves.insert(0, col)
+            if abs(score) >= _MATE_THRESHOLD:
+                break  # 勝敗が確定
+        
+        if self._search_depth > 0:
+            self._remember_pv(player, best_col)
+        return best_col
+    
+    def _reset_move_ordering(self) -> None:
+        """探索開始時に、キラー手を消して履歴を半減させ、統計を初期化する"""
+        for killers in self._killers:
+            killers[0] = killers[1] = -1
+        for player in (1, 2):
+            history = self._history[player]
+            for cell in range(64):
+                history[cell] >>= 1
+        self._cutoffs = 0
+        self._first_move_cutoffs = 0
+        self._depth_nodes = []
+        self._iteration_stats = []
+        self._pvs_researches = 0
+        self._lmr_researches = 0
+    
+    def _order_moves(self, moves: List[int], count: int, player: int, ply: int, tt_move: int) -> None:
+        """moves の先頭 count 手を、置換表の手 → キラー手 → 履歴の点数（同点は通るライン数）の高い順にその場で並べる
+        
+        点数が同じ手は元の順（走査順）のまま残す
+        """
+        heights = self._heights
+        history = self._history[player]
+        keys = self._order_keys[ply][count]
+        killers = self._killers[ply]
+        first_killer, second_killer = killers[0], killers[1]
+        for i in range(count):
+            col = moves[i]
+            if col == tt_move:
+                key = 0
+            elif col == first_killer:
+                key = 1
+            elif col == second_killer:
+                key = 2
+            else:
+                cell = col + 16 * heights[col]
+                key = _ORDER_FIRST_KEY - history[cell] * 8 - _CELL_LINE_COUNTS[cell]
+            # 小さい順に並べると点数の高い順・同点は元の順になるよう、点数・位置・列を1つの整数にまとめる
+            keys[i] = key << 8 | i << 4 | col
+        keys.sort()  # 長さ count の確保済みのリストをその場で並べる
+        for i in range(count):
+            moves[i] = keys[i] & 15
+            keys[i] = 0  # 大きな整数を探索の後まで持ち続けない
+    
+    def _record_cutoff(self, col: int, player: int, ply: int, depth: int, move_index: int) -> None:
+        """βカットした手をキラー手と履歴に記録"""
+        self._cutoffs += 1
+        if move_index == 0:
+            self._first_move_cutoffs += 1
+        killers = self._killers[ply]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self._history[player][col + 16 * self._heights[col]] += depth * depth
+    
+    def _ordering_summary(self) -> str:
+        """手の並べ替えの効果（初手でのβカット率と実効分岐数）を表す文字列"""
+        rate = self._first_move_cutoffs / self._cutoffs * 100 if self._cutoffs else 0.0
+        branching = [later / earlier for earlier, later in zip(self._depth_nodes, self._depth_nodes[1:]) if earlier]
+        branching_text = f"{branching[-1]:.1f}" if branching else "-"
+        fails = sum(stats["fail_lows"] + stats["fail_highs"] for stats in self._iteration_stats)
+        return (f"βカット {self._cutoffs}回 (初手でのカット率 {rate:.1f}%), 実効分岐数 {branching_text}, "
+                f"探索窓から外れた再探索 {fails}回, ヌルウィンドウの再探索 {self._pvs_researches}回, "
+                f"浅く読んだ手の再探索 {self._lmr_researches}回")
+    
+    def _remember_pv(self, player: int, best_col: int) -> None:
+        """置換表から読み筋を取り出し、相手の予想応手を指した後の局面キーを記録"""
+        pv = []
+        side = player
+        col = best_col
+        while len(pv) < self._search_depth and self._heights[col] < 4:
+            won = self._is_winning_cell(col + 16 * self._heights[col], side)
+            self._make_move(col, side)
+            pv.append(col)
+            if len(pv) == 2:
+                self._predicted_key = self._canonical_hash()[0]
+            side = 3 - side
+            if won:
+                break
+            board_key, symmetry = self._canonical_hash()
+            slot = self._tt_probe(board_key ^ _ZOBRIST_SIDE[side])
+            if slot < 0:
+                break
+            col = _SYMMETRY_INVERSE_COLS[symmetry][self._tt_moves[slot]]
+        for i in range(len(pv) - 1, -1, -1):
+            self._unmake_move(pv[i], player if i % 2 == 0 else 3 - player)
+        self._pv = pv
+    
+    def _search_aspiration(self, moves: List[int], depth: int, player: int) -> Tuple[int, int]:
+        """前の深さの評価値の前後に窓を取ってルートを探索し、外れたらその側を広げて読み直す
+        
+        評価値は深さの偶奇で振れるため、2つ前の深さ（同じ側が最後に指す）の評価値を窓の中心にする。
+        同じ偶奇の深さをまだ読んでいない最初の2つの深さと、勝敗が見えている場合は窓を取らない。
+        窓の統計は _iteration_stats に残す
+        """
+        iterations = self._iteration_stats
+        if (len(iterations) >= 2 and abs(iterations[-2]["score"]) < _MATE_THRESHOLD
+                and abs(self._search_score) < _MATE_THRESHOLD):
+            center = iterations[-2]["score"]
+            alpha = center - _ASPIRATION_WINDOW
+            beta = center + _ASPIRATION_WINDOW
+        else:
+            alpha, beta = -_INFINITY, _INFINITY
+        stats = {"depth": depth, "window": (alpha, beta), "fail_lows": 0, "fail_highs": 0}
+        start_nodes = self._nodes
+        low_width = high_width = _ASPIRATION_WINDOW
+        while True:
+            score, col = self._search_root(moves, depth, player, alpha, beta)
+            if score <= alpha and alpha > -_INFINITY:
+                # 下に外れた（どの手も α 以下）: 最善手が分からないので α を下げて読み直す
+                stats["fail_lows"] += 1
+                low_width *= _ASPIRATION_GROWTH
+                alpha = score - low_width if abs(score) < _MATE_THRESHOLD else -_INFINITY
+            elif score >= beta and beta < _INFINITY:
+                # 上に外れた（β 以上の手がある）: 正確な評価値を得るため β を上げて読み直す
+                stats["fail_highs"] += 1
+                high_width *= _ASPIRATION_GROWTH
+                beta = score + high_width if abs(score) < _MATE_THRESHOLD else _INFINITY
+            else:
+                break
+        stats["score"] = score
+        stats["nodes"] = self._nodes - start_nodes
+        self._iteration_stats.append(stats)
+        return score, col
+    
+    def _search_root(self, moves: List[int], depth: int, player: int,
+                     alpha: int = -_INFINITY, beta: int = _INFINITY) -> Tuple[int, int]:
+        """ルート局面を窓 (alpha, beta) と深さ depth で探索し、(評価値, 最善の列) を返す
+        
+        最初の手だけ窓全体で読み、以降の手はヌルウィンドウで最善より良くないことを確かめる（PVS）
+        """
+        opponent = 3 - player
+        best = -_INFINITY
+        best_col = moves[0]
+        self._extension_limit = 2 * depth
+        for i, col in enumerate(moves):
+            self._make_move(col, player)
+            if i == 0:
+                score = -self._negamax(depth - 1, -beta, -alpha, opponent, 1)
+            else:
+                score = -self._negamax(depth - 1, -alpha - 1, -alpha, opponent, 1)
+                if alpha < score < beta:
+                    self._pvs_researches += 1
+                    score = -self._negamax(depth - 1, -beta, -alpha, opponent, 1)
+            self._unmake_move(col, player)
+            if score > best:
+                best = score
+                best_col = col
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best, best_col
+    
+    def _tt_probe(self, key: int) -> int:
+        """置換表で key のエントリがあるスロットを返す（なければ -1）"""
+        slot = key & _TT_MASK
+        return slot if self._tt_keys[slot] == key else -1
+    
+    def _tt_store(self, key: int, depth: int, flag: int, score: int, move: int, ply: int) -> bool:
+        """置換表に保存し、保存したかを返す（空き・同一局面・もう現れない局面・同じ深さ以上なら置き換える）"""
+        slot = key & _TT_MASK
+        stored_key = self._tt_keys[slot]
+        if (stored_key and stored_key != key and self._tt_stones[slot] >= self._root_stones
+                and self._tt_depths[slot] > depth):
+            return False  # まだ現れうる局面の、より深い結果を残す
+        # 勝敗の評価値は「この局面から何手で決まるか」に直して保存
+        if score >= _MATE_THRESHOLD:
+            score += ply
+        elif score <= -_MATE_THRESHOLD:
+            score -= ply
+        self._tt_keys[slot] = key
+        self._tt_depths[slot] = depth
+        self._tt_flags[slot] = flag
+        self._tt_scores[slot] = score
+        self._tt_moves[slot] = move
+        self._tt_stones[slot] = self._root_stones + ply
+        return True
+    
+    def _set_limits(self, time_limit: float, node_budget: int = _UNLIMITED_NODES) -> None:
+        """探索を打ち切る時刻とノード数を、今から time_limit 秒後と node_budget ノード後に設定する"""
+        self._deadline = time.process_time() + time_limit
+        self._node_limit = self._nodes + node_budget
+    
+    def _count_node(self) -> None:
+        """ノードを1つ数え、ノード数の上限か制限時間に達していたら _SearchTimeout で探索を打ち切る"""
+        self._nodes += 1
+        if self._nodes >= self._node_limit:
+            raise _SearchTimeout()
+        if not self._nodes & (_TIME_CHECK_INTERVAL - 1) and time.process_time() >= self._deadline:
+            raise _SearchTimeout()
+    
+    def _classify_moves(self, player: int, ply: int) -> Tuple[int, int]:
+        """手番 player の局面を分類し、(_MOVES_* の種類, 読む手の数) を返す（αβ探索・終盤ソルバー・証明数探索で共通）
+        
+        読む手は _move_buffers[ply] の先頭に書き込む。
+        塞がないと負ける相手のリーチがあれば、塞ぐ手だけを読む。
+        置くと相手がその上に置いて勝つ列（相手の脅威マスの真下）は読む手から除く
+        """
+        heights = self._heights
+        moves = self._move_buffers[ply]
+        count = 0
+        threat_col = -1  # 相手が次に勝てる列（塞がないと負け）
+        threat_count = 0
+        own_threats = self._threats[player]
+        opponent_threats = self._threats[3 - player]
+        under_threat = False  # 相手の脅威マスの真下にしか置けない列があったか
+        for col in _SCAN_ORDER:
+            z = heights[col]
+            if z < 4:
+                cell = col + 16 * z
+                if own_threats >> cell & 1:
+                    moves[0] = col
+                    return _MOVES_WIN, 1  # 即勝ち
+                if opponent_threats >> cell & 1:
+                    threat_col = col
+                    threat_count += 1
+                elif opponent_threats >> (cell + 16) & 1:
+                    under_threat = True
+                    continue
+                moves[count] = col
                 count += 1
-                nx, ny, nz = nx - dx, ny - dy, nz - dz
-            
-            if count >= 4:
+        if threat_count:
+            if threat_count >= 2:
+                return _MOVES_LOSS, 0  # 両方は塞げない
+            moves[0] = threat_col
+            return _MOVES_FORCED, 1  # 塞ぐ手以外は即負け
+        if not count:
+            if under_threat:
+                return _MOVES_LOSS, 0  # どこに置いても相手の脅威の下（ツークツワンク）
+            return _MOVES_DRAW, 0
+        return _MOVES_NORMAL, count
+    
+    def _negamax(self, depth: int, alpha: int, beta: int, player: int, ply: int) -> int:
+        """手番 player 視点の評価値を返すネガマックス（αβ枝刈り + 置換表）"""
+        self._count_node()
+        
+        board_key, symmetry = self._canonical_hash()
+        key = board_key ^ _ZOBRIST_SIDE[player]
+        tt_move = -1
+        slot = self._tt_probe(key)
+        if slot >= 0:
+            tt_move = _SYMMETRY_INVERSE_COLS[symmetry][self._tt_moves[slot]]  # 標準形の列を元の向きに戻す
+            if self._tt_depths[slot] >= depth:
+                score = self._tt_scores[slot]
+                if score >= _MATE_THRESHOLD:
+                    score -= ply
+                elif score <= -_MATE_THRESHOLD:
+                    score += ply
+                flag = self._tt_flags[slot]
+                if (flag == _TT_EXACT or (flag == _TT_LOWER and score >= beta)
+                        or (flag == _TT_UPPER and score <= alpha)):
+                    return score
+        
+        kind, count = self._classify_moves(player, ply)
+        if kind == _MOVES_WIN:
+            return _WIN_SCORE - ply
+        if kind == _MOVES_LOSS:
+            return -(_WIN_SCORE - ply - 1)
+        if kind == _MOVES_DRAW:
+            return 0
+        opponent = 3 - player
+        own_threats = self._threats[player]
+        moves = self._move_buffers[ply]
+        if kind == _MOVES_FORCED:
+            if depth > 0 and ply < self._extension_limit:
+                depth += self.threat_extension  # 応手が1つしかないので深さを減らさずに読む（リーチの応酬を読み切りやすくする）
+        elif depth <= 0:
+            return self._static_evaluation(player)
+        else:
+            self._order_moves(moves, count, player, ply, tt_move)
+        
+        alpha_orig = alpha
+        best = -_INFINITY
+        best_col = moves[0]
+        # 後ろの方に並んだ静かな手は浅く読む（LMR）。キラー手はβカットしやすいので対象外
+        reduction = self.lmr_reduction if depth >= self.lmr_min_depth else 0
+        lmr_min_moves = self.lmr_min_moves
+        killers = self._killers[ply]
+        for i in range(count):
+            col = moves[i]
+            self._make_move(col, player)
+            if i == 0:
+                score = -self._negamax(depth - 1, -beta, -alpha, opponent, ply + 1)
+            else:
+                if (reduction and i >= lmr_min_moves and col != killers[0] and col != killers[1]
+                        and not self._threats[player] & ~own_threats):
+                    # 新しいリーチを作らない静かな手は浅く読み、α を超えたら元の深さで読み直す
+                    score = -self._negamax(depth - 1 - reduction, -alpha - 1, -alpha, opponent, ply + 1)
+                    if score > alpha:
+                        self._lmr_researches += 1
+                        score = -self._negamax(depth - 1, -alpha - 1, -alpha, opponent, ply + 1)
+                else:
+                    # 最初の手より良くないことをヌルウィンドウで確かめ、良さそうなら窓全体で読み直す（PVS）
+                    score = -self._negamax(depth - 1, -alpha - 1, -alpha, opponent, ply + 1)
+                if alpha < score < beta:
+                    self._pvs_researches += 1
+                    score = -self._negamax(depth - 1, -beta, -alpha, opponent, ply + 1)
+            self._unmake_move(col, player)
+            if score > best:
+                best = score
+                best_col = col
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._record_cutoff(col, player, ply, depth, i)
+                        break
+        
+        if best <= alpha_orig:
+            flag = _TT_UPPER
+        elif best >= beta:
+            flag = _TT_LOWER
+        else:
+            flag = _TT_EXACT
+        self._tt_store(key, depth, flag, best, _SYMMETRY_COLS[symmetry][best_col], ply)
+        return best
+    
+    # === 脅威探索（リーチの連続による勝ちの読み切り） ===
+    
+    def _threat_analysis(self, player: int, time_limit: float) -> Tuple[Optional[int], Tuple[int, ...]]:
+        """(リーチの連続で勝ち切れる列, 相手にリーチの連続で勝ち切られる列) を返す
+        
+        制限時間を超えた場合は、それまでに分かった結果だけを返す
+        """
+        self._set_limits(time_limit)
+        state = self._save_state()
+        opponent = 3 - player
+        losing_cols = []
+        try:
+            win_col = self._find_threat_win(player, _THREAT_SEARCH_DEPTH)
+            if win_col is not None:
+                return win_col, ()
+            heights = self._heights
+            for col in _SCAN_ORDER:
+                if heights[col] < 4:
+                    self._make_move(col, player)
+                    lost = self._threat_win(opponent, _THREAT_SEARCH_DEPTH)
+                    self._unmake_move(col, player)
+                    if lost:
+                        losing_cols.append(col)
+        except _SearchTimeout:
+            self._restore_state(state)
+        return None, tuple(losing_cols)
+    
+    def _winning_columns(self, player: int) -> List[int]:
+        """player が置けばすぐ勝てる（4つ目が置ける高さにある）列の一覧"""
+        heights = self._heights
+        columns = []
+        for col in _SCAN_ORDER:
+            z = heights[col]
+            if z < 4 and self._is_winning_cell(col + 16 * z, player):
+                columns.append(col)
+        return columns
+    
+    def _may_create_threat(self, cell: int, player: int) -> bool:
+        """cell に置くとリーチ（3つ並び + 空き）ができうるか（置いた後の判定の前の絞り込み）"""
+        own_counts = self._line_counts[player]
+        opponent_counts = self._line_counts[3 - player]
+        for line in _CELL_LINES[cell]:
+            if own_counts[line] == 2 and not opponent_counts[line]:
                 return True
+        # 自分のリーチの真下に置くと、そのマスが置ける高さになる
+        return cell < 48 and self._is_winning_cell(cell + 16, player)
+    
+    def _find_threat_win(self, attacker: int, depth: int) -> Optional[int]:
+        """attacker の手番で、リーチをかけ続けて勝ち切れる最初の列（なければ None）"""
+        defender = 3 - attacker
+        wins = self._winning_columns(attacker)
+        if wins:
+            return wins[0]
+        defender_wins = self._winning_columns(defender)
+        if depth <= 0 or len(defender_wins) >= 2:
+            return None
+        heights = self._heights
+        # 相手のリーチがあれば、それを塞ぐ手しか指せない
+        candidates = defender_wins or [col for col in _SCAN_ORDER if heights[col] < 4]
+        for col in candidates:
+            if not self._may_create_threat(col + 16 * heights[col], attacker):
+                continue
+            self._make_move(col, attacker)
+            won = self._threat_follow_up(attacker, depth)
+            self._unmake_move(col, attacker)
+            if won:
+                return col
+        return None
+    
+    def _threat_win(self, attacker: int, depth: int) -> bool:
+        """attacker の手番で、リーチをかけ続けて勝ち切れるか"""
+        return self._find_threat_win(attacker, depth) is not None
+    
+    def _threat_follow_up(self, attacker: int, depth: int) -> bool:
+        """attacker が石を置いた直後の局面で、相手の応手に関わらず勝ち切れるか"""
+        self._count_node()
+        
+        defender = 3 - attacker
+        if self._winning_columns(defender):
+            return False  # 相手が先に勝つ
+        threats = self._winning_columns(attacker)
+        if not threats:
+            return False  # リーチになっていない
+        if len(threats) >= 2:
+            return True  # 両方は塞げない
+        # 相手は唯一のリーチを塞ぐしかない
+        block_col = threats[0]
+        self._make_move(block_col, defender)
+        won = self._threat_win(attacker, depth - 1)
+        self._unmake_move(block_col, defender)
+        return won
+    
+    # === 終盤ソルバー（完全読み） ===
+    
+    def _solve_endgame(self, player: int, time_limit: float, node_budget: int) -> Optional[Tuple[int, int]]:
+        """盤面が埋まるまで読み切り、(最善の列, 評価値) を返す（上限を超えたら None）
+        
+        評価値は勝ちなら _WIN_SCORE - 手数、負けならその符号反転、引き分けなら 0
+        """
+        heights = self._heights
+        moves = [col for col in _SCAN_ORDER if heights[col] < 4]
+        if not moves:
+            return None
+        for col in moves:
+            if self._is_winning_cell(col + 16 * heights[col], player):
+                return col, _WIN_SCORE  # 即勝ち
+        self._set_limits(time_limit, node_budget)
+        self._reset_move_ordering()
+        self._order_moves(moves, len(moves), player, 0, -1)
+        
+        state = self._save_state()
+        opponent = 3 - player
+        alpha = -_INFINITY
+        best_col = moves[0]
+        try:
+            for col in moves:
+                self._make_move(col, player)
+                score = -self._solve(-_INFINITY, -alpha, opponent, 1)
+                self._unmake_move(col, player)
+                if score > alpha:
+                    alpha = score
+                    best_col = col
+        except _SearchTimeout:
+            self._restore_state(state)
+            return None
+        return best_col, alpha
+    
+    def _solve(self, alpha: int, beta: int, player: int, ply: int) -> int:
+        """静的評価を使わず最後まで読む、手番 player 視点のネガマックス"""
+        self._count_node()
+        
+        board_key, symmetry = self._canonical_hash()
+        key = board_key ^ _ZOBRIST_SIDE[player]
+        slot = key & _SOLVED_TABLE_MASK
+        if self._solved_keys[slot] == key:
+            score = self._solved_scores[slot]
+            if score >= _MATE_THRESHOLD:
+                score -= ply
+            elif score <= -_MATE_THRESHOLD:
+                score += ply
+            flag = self._solved_flags[slot]
+            if (flag == _TT_EXACT or (flag == _TT_LOWER and score >= beta)
+                    or (flag == _TT_UPPER and score <= alpha)):
+                return score
+        
+        kind, count = self._classify_moves(player, ply)
+        if kind == _MOVES_WIN:
+            return _WIN_SCORE - ply
+        if kind == _MOVES_LOSS:
+            return -(_WIN_SCORE - ply - 1)
+        if kind == _MOVES_DRAW:
+            return 0
+        moves = self._move_buffers[ply]
+        if kind == _MOVES_NORMAL:
+            self._order_moves(moves, count, player, ply, -1)
+        opponent = 3 - player
+        
+        alpha_orig = alpha
+        best = -_INFINITY
+        for i in range(count):
+            col = moves[i]
+            self._make_move(col, player)
+            score = -self._solve(-beta, -alpha, opponent, ply + 1)
+            self._unmake_move(col, player)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._record_cutoff(col, player, ply, 1, i)
+                        break
         
-        return False
\ No newline at end of file
+        if best <= alpha_orig:
+            flag = _TT_UPPER
+        elif best >= beta:
+            flag = _TT_LOWER
+        else:
+            flag = _TT_EXACT
+        stored = best
+        if stored >= _MATE_THRESHOLD:
+            stored += ply
+        elif stored <= -_MATE_THRESHOLD:
+            stored -= ply
+        self._solved_keys[slot] = key
+        self._solved_flags[slot] = flag
+        self._solved_scores[slot] = stored
+        return best
+    
+    # === 証明数探索（df-pn） ===
+    
+    def _tactical_density(self) -> int:
+        """局面の緊迫度（両プレイヤーの、まだ埋まっていない脅威マスの数）"""
+        occupied = self._bits[1] | self._bits[2]
+        return _popcount((self._threats[1] | self._threats[2]) & ~occupied)
+    
+    def _proof_search(self, player: int, time_limit: float, node_budget: int) -> Optional[Tuple[bool, Optional[int]]]:
+        """手番 player に必勝手順があるかを df-pn で調べ、(必勝か, 勝ち切る列) を返す（上限を超えたら None）
+        
+        必勝でない（引き分け以下に持ち込まれる）ことが証明できた場合は (False, None) を返す
+        """
+        if self._proof_attacker != player:
+            if self._proof_attacker:
+                # 攻め手が変わると証明の意味が変わるため、表を空にする
+                self._proof_keys[:] = array("Q", bytes(8 * _PROOF_TABLE_SIZE))
+            self._proof_attacker = player
+        self._set_limits(time_limit, node_budget)
+        start_nodes = self._nodes
+        self._proof_best_col = None
+        state = self._save_state()
+        try:
+            phi, delta = self._proof_mid(player, _PROOF_INFINITY, _PROOF_INFINITY, 0)
+        except _SearchTimeout:
+            self._restore_state(state)
+            return None
+        finally:
+            self._proof_nodes = self._nodes - start_nodes
+        if phi:
+            return False, None
+        if self._proof_best_col is None:
+            return True, self._find_winning_column(player)  # 最初から勝てる列があった
+        return True, self._proof_best_col
+    
+    def _proof_mid(self, player: int, phi_limit: int, delta_limit: int, ply: int) -> Tuple[int, int]:
+        """手番 player の局面を φ か δ がしきい値に達するまで展開し、(φ, δ) を返す（df-pn）
+        
+        φ・δ は手番側から見た証明数・反証数（手番側の勝ちを示すのに必要な末端の数と、その逆）。
+        攻め手の手番では φ が必勝の証明数、守り手の手番では δ が必勝の証明数になる
+        """
+        self._count_node()
+        
+        kind, count = self._classify_moves(player, ply)
+        if kind == _MOVES_WIN:
+            return 0, _PROOF_INFINITY
+        if kind == _MOVES_LOSS:
+            return _PROOF_INFINITY, 0
+        if kind == _MOVES_DRAW:
+            if player == self._proof_attacker:
+                return _PROOF_INFINITY, 0  # 攻め手が勝ち切れずに盤面が埋まった
+            return 0, _PROOF_INFINITY  # 守り手が引き分けに持ち込んだ
+        moves = self._move_buffers[ply]
+        heights = self._heights
+        opponent = 3 - player
+        
+        # 子の局面の (φ, δ) をまとめて表から引く（表から消えても、この局面の展開中は手元の値を使う）
+        phis = []
+        deltas = []
+        proof_keys = self._proof_keys
+        hashes = self._hashes
+        side_key = _ZOBRIST_SIDE[opponent]
+        symmetric_keys = _ZOBRIST_SYMMETRIC[player]
+        for i in range(count):
+            col = moves[i]
+            # 石を置かずに、置いた後の8通りの対称なキーの最小（標準形）を求める
+            cell_keys = symmetric_keys[col + 16 * heights[col]]
+            key = min([hashes[s] ^ cell_keys[s] for s in range(_NUM_SYMMETRIES)]) ^ side_key
+            slot = key & _PROOF_TABLE_MASK
+            if proof_keys[slot] == key:
+                phis.append(self._proof_phis[slot])
+                deltas.append(self._proof_deltas[slot])
+            else:
+                phis.append(1)
+                deltas.append(1)
+        
+        while True:
+            # φ は子の δ の最小、δ は子の φ の和（手番側はどれか1手で勝てばよく、相手は全ての手を防ぐ必要がある）
+            phi = min(deltas)
+            delta = min(_PROOF_INFINITY, sum(phis))
+            if phi >= phi_limit or delta >= delta_limit:
+                break
+            best = deltas.index(phi)
+            second = min(deltas[:best] + deltas[best + 1:], default=_PROOF_INFINITY)
+            child_phi_limit = min(_PROOF_INFINITY, delta_limit - delta + phis[best])
+            child_delta_limit = min(phi_limit, second + 1)
+            col = moves[best]
+            self._make_move(col, player)
+            phis[best], deltas[best] = self._proof_mid(opponent, child_phi_limit, child_delta_limit, ply + 1)
+            self._unmake_move(col, player)
+        if not phi:
+            # 勝ちが証明された手を残す（最後に証明が終わるのはルートなので、ルートの勝ち切る手になる）
+            self._proof_best_col = moves[deltas.index(0)]
+        
+        key = self._canonical_hash()[0] ^ _ZOBRIST_SIDE[player]
+        slot = key & _PROOF_TABLE_MASK
+        proof_keys[slot] = key
+        self._proof_phis[slot] = phi
+        self._proof_deltas[slot] = delta
+        return phi, delta
+    
+    # === 探索の計測（開発用） ===
+    
+    def enable_instrumentation(self, timing: bool = True, profile: bool = False) -> None:
+        """探索の統計を取るよう、このインスタンスのメソッドを計測付きに差し替える
+        
+        差し替えるのはインスタンスの属性だけなので、呼ばない限りクラスのメソッドがそのまま使われる。
+        timing=True なら呼び出し回数・分類ごとの時間・置換表の統計も取る（その分だけ探索は遅くなる）。
+        profile=True なら1手ごとに cProfile で記録する（計測のラッパーが混ざらないよう timing=False で使う）
+        """
+        if self._stats is not None:
+            return
+        self._stats = {
+            "calls": {name: 0 for name, _ in _INSTRUMENTED_METHODS},
+            "time": {category: 0.0 for category in _INSTRUMENTED_CATEGORIES},
+            "tt": {key: 0 for key in _TT_STAT_KEYS},
+            "move": {},
+        }
+        # 計測中の分類とその開始時刻（入れ子の呼び出しは内側の分類だけに計上する）
+        self._stats_clock = [None, 0.0]
+        if timing:
+            for name, category in _INSTRUMENTED_METHODS:
+                setattr(self, name, self._timed_method(getattr(self, name), name, category))
+            self._tt_probe = self._counted_tt_probe(self._tt_probe)
+            self._tt_store = self._counted_tt_store(self._tt_store)
+        self.get_move = self._instrumented_get_move(self.get_move, profile)
+    
+    def _timed_method(self, method, name: str, category: str):
+        """呼び出し回数と、分類ごとの（入れ子を除いた）経過時間を数えるラッパーを返す"""
+        calls = self._stats["calls"]
+        times = self._stats["time"]
+        clock = self._stats_clock
+        perf_counter = time.perf_counter
+        
+        def timed(*args):
+            calls[name] += 1
+            outer = clock[0]
+            if outer == category:
+                return method(*args)
+            now = perf_counter()
+            if outer is not None:
+                times[outer] += now - clock[1]
+            clock[0], clock[1] = category, now
+            try:
+                return method(*args)
+            finally:
+                now = perf_counter()
+                times[category] += now - clock[1]
+                clock[0], clock[1] = outer, now
+        
+        return timed
+    
+    def _counted_tt_probe(self, probe):
+        """置換表の参照・ヒット・衝突（同じスロットに別の局面）を数えるラッパーを返す"""
+        counts = self._stats["tt"]
+        
+        def counted(key: int) -> int:
+            counts["probes"] += 1
+            stored_key = self._tt_keys[key & _TT_MASK]
+            if stored_key:
+                if stored_key == key:
+                    counts["hits"] += 1
+                else:
+                    counts["collisions"] += 1
+            return probe(key)
+        
+        return counted
+    
+    def _counted_tt_store(self, store):
+        """置換表への保存と、別の局面のエントリを置き換えた回数を数えるラッパーを返す"""
+        counts = self._stats["tt"]
+        
+        def counted(key: int, depth: int, flag: int, score: int, move: int, ply: int) -> bool:
+            stored_key = self._tt_keys[key & _TT_MASK]
+            stored = store(key, depth, flag, score, move, ply)
+            if stored:
+                counts["stores"] += 1
+                if stored_key and stored_key != key:
+                    counts["replacements"] += 1
+            return stored
+        
+        return counted
+    
+    def _instrumented_get_move(self, get_move, profile: bool):
+        """1手ごとに統計を初期化し、手全体の時間を測る（profile なら cProfile で記録する）ラッパーを返す"""
+        if profile:
+            import cProfile  # 開発用（profile=True のときだけ読み込む）
+        stats = self._stats
+        
+        def instrumented(board: Board, player: int, last_move: Tuple[int, int, int]) -> Tuple[int, int]:
+            for group in ("calls", "time", "tt"):
+                for key in stats[group]:
+                    stats[group][key] = 0
+            self._stats_clock[0] = None
+            self._cutoffs = self._first_move_cutoffs = self._pvs_researches = self._lmr_researches = 0
+            self._depth_nodes = []
+            self._iteration_stats = []
+            profiler = cProfile.Profile() if profile else None
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return get_move(board, player, last_move)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    self.last_profile = profiler
+                stats["move"] = {
+                    "wall_seconds": time.perf_counter() - wall_start,
+                    "cpu_seconds": time.process_time() - cpu_start,
+                }
+        
+        return instrumented
+    
+    def search_report(self) -> dict:
+        """直前の手の探索の統計を、JSON にそのまま書き出せる dict で返す（計測が無効なら空）
+        
+        time の各分類は入れ子を除いた経過時間で、other は手全体からそれらを引いた残り（αβ探索の本体など）
+        """
+        if self._stats is None or not self._stats["move"]:
+            return {}
+        move = self._stats["move"]
+        tt = dict(self._stats["tt"])
+        tt["hit_rate"] = tt["hits"] / tt["probes"] if tt["probes"] else 0.0
+        times = dict(self._stats["time"])
+        times["other"] = max(0.0, move["wall_seconds"] - sum(times.values()))
+        return {
+            "nodes": self._nodes,
+            "cpu_seconds": move["cpu_seconds"],
+            "wall_seconds": move["wall_seconds"],
+            "depth": self._search_depth if self._depth_nodes else 0,
+            "nodes_per_depth": list(self._depth_nodes),
+            "cutoffs": self._cutoffs,
+            "first_move_cutoffs": self._first_move_cutoffs,
+            "first_move_cutoff_rate": self._first_move_cutoffs / self._cutoffs if self._cutoffs else 0.0,
+            "iterations": [dict(stats, window=list(stats["window"])) for stats in self._iteration_stats],
+            "pvs_researches": self._pvs_researches,
+            "lmr_researches": self._lmr_researches,
+            "proof": {"result": self._proof_result, "nodes": self._proof_nodes},
+            "tt": tt,
+            "time": times,
+            "calls": dict(self._stats["calls"]),
+        }
@@ -3,9 +3,14 @@
 アルゴリズムのテスト用スクリプト
 """
 
+import random
 import time
+from dev_tools import board_from_moves
 from main import MyAI
 
+# 定跡を使わずに探索する中盤の局面の手順（"xy" を空白区切り、先手から交互に置く）
+MIDDLEGAME_MOVES = "11 23 11 11 01 33 00 03 13 23 10 12"
+
 def create_test_board():
     """テスト用の盤面を生成"""
     # 4x4x4の空の盤面
@@ -101,10 +106,10 @@ def test_find_best_move():
     print(f"最適手: {best_move}")
     print(f"探索時間: {end_time-start_time:.4f}秒")
 
-def test_calculate_reward():
-    """calculate_reward関数のテスト"""
+def test_evaluate_position_by_player():
+    """evaluate_position関数のプレイヤー別のテスト"""
     print("\n" + "=" * 50)
-    print("calculate_reward関数のテスト")
+    print("evaluate_position関数のプレイヤー別のテスト")
     print("=" * 50)
     
     ai = MyAI()
@@ -123,17 +128,17 @@ def test_calculate_reward():
         print(f"\n位置 ({x}, {y}, {z}) の報酬:")
         
         # プレイヤー1の報酬
-        reward1 = ai.calculate_reward(board, x, y, z, 1)
+        reward1 = ai.evaluate_position(board, x, y, z, 1)
         print(f"  プレイヤー1: {reward1}点")
         
         # プレイヤー2の報酬
-        reward2 = ai.calculate_reward(board, x, y, z, 2)
+        reward2 = ai.evaluate_position(board, x, y, z, 2)
         print(f"  プレイヤー2: {reward2}点")
 
-def test_get_max_opponent_reward():
-    """get_max_opponent_reward関数のテスト"""
+def test_get_opponent_max_score_after_my_move():
+    """get_opponent_max_score_after_my_move関数のテスト"""
     print("\n" + "=" * 50)
-    print("get_max_opponent_reward関数のテスト")
+    print("get_opponent_max_score_after_my_move関数のテスト")
     print("=" * 50)
     
     ai = MyAI()
@@ -152,13 +157,381 @@ def test_get_max_opponent_reward():
         print(f"\n位置 ({x}, {y}, {z}) での相手の最大報酬:")
         
         # プレイヤー1の視点での相手（プレイヤー2）の最大報酬
-        max_reward1 = ai.get_max_opponent_reward(board, x, y, z, 2, 0)
+        max_reward1 = ai.get_opponent_max_score_after_my_move(board, x, y, z, 1, 0)
         print(f"  プレイヤー1の視点: {max_reward1}点")
         
         # プレイヤー2の視点での相手（プレイヤー1）の最大報酬
-        max_reward2 = ai.get_max_opponent_reward(board, x, y, z, 1, 0)
+        max_reward2 = ai.get_opponent_max_score_after_my_move(board, x, y, z, 2, 0)
         print(f"  プレイヤー2の視点: {max_reward2}点")
 
+def random_position(rng, min_ply, max_ply, avoid_wins=True):
+    """ランダムに石を置いた盤面と次の手番 (board, player) を返す（作れなかったら None）
+    
+    手数は min_ply 以上 max_ply 未満から選ぶ。avoid_wins=True なら、すぐ勝てるマスには置かず、
+    どちらもすぐには勝てない局面で止める（その手数でそうならなければ数手まで延ばす）
+    """
+    board = [[[0 for x in range(4)] for y in range(4)] for z in range(4)]
+    ai = MyAI(use_opening_book=False)
+    ai._load_board(board)
+    player = 1
+    target = rng.randrange(min_ply, max_ply)
+    for ply in range(target + 6 if avoid_wins else target):
+        if avoid_wins and ply >= target and ai._find_winning_column(player) is None \
+                and ai._find_winning_column(3 - player) is None:
+            return board, player
+        columns = [col for col in range(16) if ai._heights[col] < 4
+                   and not (avoid_wins and ai._is_winning_cell(col + 16 * ai._heights[col], player))]
+        if not columns:
+            break
+        col = rng.choice(columns)
+        board[ai._heights[col]][col >> 2][col & 3] = player
+        ai._make_move(col, player)
+        player = 3 - player
+    if avoid_wins:
+        return None
+    return board, player
+
+def random_positions(rng, count, min_ply, max_ply, avoid_wins=True):
+    """random_position で作った (board, player) を count 個返すジェネレータ（作れなかった分は作り直す）"""
+    made = 0
+    while made < count:
+        position = random_position(rng, min_ply, max_ply, avoid_wins)
+        if position is not None:
+            made += 1
+            yield position
+
+def reference_evaluate_cell(ai, col, player, depth):
+    """従来の経路（特徴量ごとの個別ヘルパー）で評価点を計算する（キャッシュなし）"""
+    x, y = col & 3, col >> 2
+    cell = col + 16 * ai._heights[col]
+    if depth >= 2:
+        return 0
+    score = 0
+    decay_rate = 0.95 ** depth
+    my_accessible = ai._accessible_lines(cell, player)
+    score += len(my_accessible) * 2 * decay_rate
+    score += ai._count_stones_on_lines(cell, my_accessible, player) * 2 * decay_rate
+    if (x == 0 or x == 3) and (y == 0 or y == 3):
+        score += 2 * decay_rate
+    elif (x == 1 or x == 2) and (y == 1 or y == 2):
+        score += 2 * decay_rate
+    for i in range(1, ai._count_double_reach(cell, player)):
+        score += 100 * decay_rate
+    for i in range(1, ai._count_opponent_double_reach(cell, player)):
+        score += 100 * decay_rate
+    opponent_winning_moves = ai._count_opponent_wins_after(col, player)
+    if opponent_winning_moves > 0:
+        score -= opponent_winning_moves * 100 * decay_rate
+    elif depth < 2:
+        max_score = -1
+        ai._make_move(col, player)
+        for opp_col in range(16):
+            if ai._heights[opp_col] < 4:
+                max_score = max(max_score, reference_evaluate_cell(ai, opp_col, 3 - player, depth + 1))
+        ai._unmake_move(col, player)
+        score -= (max_score if max_score > -1 else 0) * 0.9
+    return score
+
+def test_fused_evaluator_equivalence():
+    """1回の走査で特徴量を求める評価が、従来の個別ヘルパーの経路とビット単位で一致するかのテスト"""
+    rng = random.Random(2024)
+    ai = MyAI()
+    checked = 0
+    for board, _ in random_positions(rng, 30, 0, 40):  # 勝ちが決まった局面は扱わない
+        ai._load_board(board)
+        for target in (1, 2):
+            for col in range(16):
+                if ai._heights[col] >= 4:
+                    continue
+                cell = col + 16 * ai._heights[col]
+                accessible = ai._accessible_lines(cell, target)
+                expected_features = (
+                    len(accessible),
+                    ai._count_stones_on_lines(cell, accessible, target),
+                    ai._count_double_reach(cell, target),
+                    ai._count_opponent_double_reach(cell, target),
+                    ai._count_opponent_wins_after(col, target),
+                )
+                assert ai._cell_features(col, target) == expected_features
+                for depth in range(2):
+                    assert ai._evaluate_cell(col, target, depth) == reference_evaluate_cell(ai, col, target, depth)
+                checked += 1
+    print(f"一致を確認したマス: {checked}")
+
+def test_batched_root_evaluation():
+    """全ての列をまとめて評価した結果が、列ごとの evaluate_position と一致するかのテスト"""
+    rng = random.Random(7)
+    checked = 0
+    for board, _ in random_positions(rng, 40, 0, 50, avoid_wins=False):
+        for target in (1, 2):
+            scores, best_move, breakdown = MyAI().evaluate_all_positions(board, target)
+            ai = MyAI()
+            expected_best = None
+            max_score = -1
+            for x, y in [(x, y) for x in range(4) for y in range(4)]:  # 探索と同じ走査順
+                if not ai.can_place_stone(board, x, y):
+                    assert scores[y][x] is None and breakdown["lines"][y][x] is None
+                    continue
+                z = ai.get_height(board, x, y)
+                expected = ai.evaluate_position(board, x, y, z, target, 0)
+                assert scores[y][x] == expected
+                assert breakdown["lines"][y][x] == ai.count_potential_lines(board, x, y, z, target)
+                assert breakdown["double_reach"][y][x] == ai.count_double_reach_lines(board, x, y, z, target)
+                assert breakdown["opponent_wins"][y][x] == \
+                    ai.check_opponent_winning_moves_after_my_move(board, x, y, z, target)
+                if expected > max_score:
+                    max_score = expected
+                    expected_best = (x, y)
+                checked += 1
+            assert best_move == expected_best
+    print(f"一致を確認したマス: {checked}")
+
+def test_no_retained_growth():
+    """探索の後に残るメモリが、読んだノード数によらず一定かのテスト（tracemalloc）
+    
+    置換表などの表や手数ごとの手の並びは確保済みの配列に書き込むだけなので、多く読んでも残るメモリは増えない
+    """
+    import gc
+    import tracemalloc
+    
+    board, player, _ = board_from_moves(MIDDLEGAME_MOVES)
+    
+    # 表の確保や初回だけのキャッシュを済ませてから測る
+    ai = MyAI(search_time=0.5, use_opening_book=False)
+    for _ in range(2):
+        x, y = ai.get_move(board, player, (0, 0, 0))
+        board[ai.get_height(board, x, y)][y][x] = player
+        player = 3 - player
+    
+    # 時間ではなくノード数で探索を打ち切り、読む量だけを変えて同じ局面の get_move を測る
+    set_limits = ai._set_limits
+    results = []
+    for budget in (5000, 40000):
+        ai._set_limits = lambda time_limit, node_budget=budget, budget=budget: set_limits(60.0, min(node_budget, budget))
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start, _ = tracemalloc.get_traced_memory()
+            ai.get_move(board, player, (0, 0, 0))
+            end, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results.append((ai._nodes, end - start, peak - start))
+        print(f"ノード {ai._nodes}, 残ったメモリ {end - start}B, 一時的な最大 {peak - start}B")
+    (small_nodes, small_retained, _), (large_nodes, large_retained, large_peak) = results
+    assert large_nodes >= 4 * small_nodes
+    # 盤面の変換・読み筋・時間の記録など手ごとに決まった分だけが残り、読んだ量で変わらないこと
+    assert abs(large_retained - small_retained) < 4 * 1024
+    assert large_retained < 32 * 1024
+    assert large_peak < 256 * 1024
+
+def test_proof_number_search():
+    """証明数探索の必勝・必勝でないの判定が、終盤ソルバーの完全読みと一致するかのテスト"""
+    from main import _MATE_THRESHOLD
+    
+    rng = random.Random(11)
+    ai = MyAI(use_opening_book=False)
+    solver = MyAI(use_opening_book=False)
+    count = 20
+    for board, player in random_positions(rng, count, 46, 56):  # どちらもすぐには勝てない終盤の局面
+        ai._load_board(board)
+        proof = ai._proof_search(player, 60.0, 1000000)
+        solver._load_board(board)
+        _, score = solver._solve_endgame(player, 60.0, 10 ** 8)
+        assert proof is not None
+        assert proof[0] == (score >= _MATE_THRESHOLD)
+        if proof[0]:
+            # 証明した手を指した後も、完全読みで勝ちのままであること
+            solver._load_board(board)
+            solver._make_move(proof[1], player)
+            solver._set_limits(60.0, 10 ** 8)
+            assert -solver._solve(-_MATE_THRESHOLD, _MATE_THRESHOLD, 3 - player, 1) >= _MATE_THRESHOLD
+    print(f"一致を確認した局面: {count}")
+
+def test_threat_analysis():
+    """リーチの連続で勝ち切れる列・勝ち切られる列の判定が、終盤ソルバーの完全読みと一致するかのテスト"""
+    from main import _MATE_THRESHOLD
+    
+    rng = random.Random(5)
+    ai = MyAI(use_opening_book=False)
+    solver = MyAI(use_opening_book=False)
+    
+    def solved_score(board, col, player):
+        """col に置いた後の局面を完全に読み、player 視点の評価値を返す"""
+        solver._load_board(board)
+        solver._make_move(col, player)
+        solver._set_limits(60.0, 10 ** 8)
+        return -solver._solve(-_MATE_THRESHOLD, _MATE_THRESHOLD, 3 - player, 1)
+    
+    wins = 0
+    losses = 0
+    for board, player in random_positions(rng, 20, 40, 52):
+        ai._load_board(board)
+        win_col, losing_cols = ai._threat_analysis(player, 60.0)
+        if win_col is not None:
+            assert solved_score(board, win_col, player) >= _MATE_THRESHOLD
+            wins += 1
+        for col in losing_cols:
+            assert solved_score(board, col, player) <= -_MATE_THRESHOLD
+            losses += 1
+    print(f"確認した勝ち切れる列: {wins}, 勝ち切られる列: {losses}")
+    assert wins > 0 and losses > 0
+
+def test_aspiration_search():
+    """窓を絞った反復深化（PVS + aspiration）の評価値が、深さごとに窓全体で読んだ評価値と一致するかのテスト"""
+    from main import _SCAN_ORDER, _popcount
+    
+    def prepare(board):
+        """盤面を読み込み、時間の制限なしで探索できる状態の AI を返す"""
+        ai = MyAI(use_opening_book=False)
+        ai._load_board(board)
+        ai._set_limits(10 ** 9)
+        ai._reset_move_ordering()
+        ai._root_stones = _popcount(ai._bits[1] | ai._bits[2])
+        return ai
+    
+    rng = random.Random(23)
+    count = 20
+    fails = 0
+    for board, player in random_positions(rng, count, 8, 30):
+        ai = prepare(board)
+        moves = [col for col in _SCAN_ORDER if ai._heights[col] < 4]
+        for depth in range(1, 7):
+            score, _ = ai._search_aspiration(moves, depth, player)
+            ai._search_score = score
+            expected, _ = prepare(board)._search_root(moves, depth, player)
+            assert score == expected
+        fails += sum(stats["fail_lows"] + stats["fail_highs"] for stats in ai._iteration_stats)
+    print(f"一致を確認した局面: {count}, 窓から外れた再探索: {fails}回")
+    assert fails > 0
+
+def brute_force_score(ai, board, player, ply, memo):
+    """盤面のリストを枝刈りなしで最後まで読み、手番 player 視点の評価値を返す（終盤ソルバーと同じ点数の付け方）"""
+    from main import _WIN_SCORE
+    
+    key = (str(board), player)
+    if key in memo:
+        return memo[key]
+    best = None
+    for y in range(4):
+        for x in range(4):
+            z = ai.get_height(board, x, y)
+            if z >= 4:
+                continue
+            board[z][y][x] = player
+            if ai.check_win(board, x, y, z, player):
+                score = _WIN_SCORE - ply
+            else:
+                score = -brute_force_score(ai, board, 3 - player, ply + 1, memo)
+            board[z][y][x] = 0
+            if best is None or score > best:
+                best = score
+    memo[key] = 0 if best is None else best  # 置ける場所がなければ引き分け
+    return memo[key]
+
+def test_endgame_solver():
+    """終盤ソルバーの評価値と選んだ手が、枝刈りなしの全探索と一致するかのテスト"""
+    from main import _WIN_SCORE
+    
+    rng = random.Random(12)
+    reference = MyAI(use_opening_book=False)
+    count = 20
+    for board, player in random_positions(rng, count, 50, 56):
+        ai = MyAI(use_opening_book=False)
+        ai._load_board(board)
+        col, score = ai._solve_endgame(player, 60.0, 10 ** 8)
+        assert score == brute_force_score(reference, board, player, 0, {})
+        # 選んだ手を指した後の全探索の評価値も同じであること
+        x, y = col & 3, col >> 2
+        z = reference.get_height(board, x, y)
+        board[z][y][x] = player
+        if reference.check_win(board, x, y, z, player):
+            assert score == _WIN_SCORE
+        else:
+            assert score == -brute_force_score(reference, board, 3 - player, 1, {})
+    print(f"一致を確認した局面: {count}")
+
+def test_symmetry_invariance():
+    """盤面を回転・反転しても、評価値と置換表のキー（標準形）が変わらないかのテスト"""
+    from main import _SYMMETRY_CELLS
+    
+    rng = random.Random(6)
+    ai = MyAI(use_opening_book=False)
+    checked = 0
+    for board, player in random_positions(rng, 20, 0, 40, avoid_wins=False):
+        ai._load_board(board)
+        expected_key = ai._canonical_hash()[0]
+        expected_static = ai._static_evaluation(player)
+        expected_scores, _, _ = ai.evaluate_all_positions(board, player)
+        for cells in _SYMMETRY_CELLS:
+            # 同じ変換で各マスを移した盤面
+            transformed = [[[0 for x in range(4)] for y in range(4)] for z in range(4)]
+            for cell in range(64):
+                target = cells[cell]
+                transformed[target >> 4][(target >> 2) & 3][target & 3] = board[cell >> 4][(cell >> 2) & 3][cell & 3]
+            ai._load_board(transformed)
+            assert ai._canonical_hash()[0] == expected_key
+            assert ai._static_evaluation(player) == expected_static
+            scores, _, _ = ai.evaluate_all_positions(transformed, player)
+            for col in range(16):
+                target = cells[col]
+                assert scores[target >> 2][target & 3] == expected_scores[col >> 2][col & 3]
+            checked += 1
+    print(f"一致を確認した盤面: {checked}")
+
+def test_get_move_fallback():
+    """思考中に例外が起きても、get_move がそれまでに見つかった最善手を返すかのテスト"""
+    board, player, _ = board_from_moves(MIDDLEGAME_MOVES)
+    
+    # 探索に入る前に失敗した場合は、最初に用意した安全な手
+    ai = MyAI(use_opening_book=False)
+    
+    def fail(board, player):
+        raise RuntimeError("テスト用の例外")
+    
+    ai.find_best_move = fail
+    assert ai.get_move(board, player, (0, 0, 0)) == ai.find_safe_move(board, player)
+    
+    # 安全な手を求める段階で失敗した場合は、最初に置ける列
+    ai = MyAI(use_opening_book=False)
+    ai.find_safe_move = fail
+    assert ai.get_move(board, player, (0, 0, 0)) == ai.find_first_available_move(board)
+    
+    # 反復深化の途中で失敗した場合は、最後に読み切った深さの最善手
+    ai = MyAI(use_opening_book=False)
+    search_aspiration = ai._search_aspiration
+    completed = []
+    
+    def fail_at_depth_4(moves, depth, player):
+        if depth >= 4:
+            raise RuntimeError("テスト用の例外")
+        score, col = search_aspiration(moves, depth, player)
+        completed.append(col)
+        return score, col
+    
+    ai._search_aspiration = fail_at_depth_4
+    move = ai.get_move(board, player, (0, 0, 0))
+    assert len(completed) == 3
+    assert move == (completed[-1] & 3, completed[-1] >> 2)
+    assert ai.can_place_stone(board, *move)
+
+def test_score_interval():
+    """対戦のスコア率の信頼区間が、全勝・全敗でも幅を持ち、レーティング差が有限になるかのテスト"""
+    import math
+    from tournament import elo, score_interval
+    
+    for results, expected in (([1.0] * 8, 1.0), ([0.0] * 8, 0.0)):
+        score, low, high = score_interval(results)
+        assert score == expected
+        assert 0.0 <= low < high <= 1.0
+        assert high - low > 0.2  # 8局では確かとは言えない
+        for value in (score, low, high):
+            assert math.isfinite(elo(value, len(results)))
+        assert elo(low, len(results)) < elo(high, len(results))
+    # 局数が増えれば区間は狭くなり、スコア率を含む
+    score, low, high = score_interval([1.0, 0.5, 0.0, 1.0] * 20)
+    assert low < score < high and high - low < 0.25
+
 def main():
     """メイン関数"""
     print("アルゴリズムテスト開始")
@@ -166,10 +539,20 @@ def main():
     
     try:
         # 各関数のテスト
-        test_calculate_reward()
-        test_get_max_opponent_reward()
+        test_evaluate_position_by_player()
+        test_get_opponent_max_score_after_my_move()
         test_evaluate_position()
         test_find_best_move()
+        test_fused_evaluator_equivalence()
+        test_batched_root_evaluation()
+        test_no_retained_growth()
+        test_proof_number_search()
+        test_threat_analysis()
+        test_aspiration_search()
+        test_endgame_solver()
+        test_symmetry_invariance()
+        test_get_move_fallback()
+        test_score_interval()
         
         print("\n" + "=" * 50)
         print("テスト完了")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+2つのAI（ファイルまたは git のリビジョン）を総当たりで対戦させるスクリプト（開発環境用、提出物ではない）
+
+先手・後手を入れ替えた2局を1組とし、同じ組では同じランダムな序盤から始める。
+本番と同じく1手ごとの思考時間を測り、上限を超えた手・例外・置けない手は左上から順に空いている列に置き換える。
+結果は AI_A から見た勝ち・引き分け・負けと、スコア率・レーティング差の95%信頼区間、1手あたりの思考時間の分位点で表示する。
+--instrument を付けると、両方の AI の探索の統計（MyAI.search_report）を全ての手で集計して表示する。
+
+使い方:
+    python tournament.py AI_A AI_B [--games 対局数] [--workers 並列数] [--cpu-limit 秒] [--search-time 秒] [--instrument]
+
+    AI は main.py のようなファイルのパス、または HEAD~1:main.py のような git のリビジョン指定
+    例: python tournament.py main.py HEAD~1:main.py --games 40 --search-time 0.5
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import subprocess
+import tempfile
+import time
+
+import dev_tools  # framework を local_driver で代用する（import するだけでよい）
+from local_driver import create_board, load_ai, place_disk
+
+Z_95 = 1.96  # 95%信頼区間の正規分布の係数
+
+
+def build_lines():
+    """4x4x4 の盤面で4つ並ぶ全てのライン（76本）をセル (x, y, z) のタプルで列挙"""
+    lines = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                # 同じラインを両方向から数えないよう、最初の0でない成分が正の方向だけを使う
+                if (dx, dy, dz) <= (0, 0, 0):
+                    continue
+                for x in range(4):
+                    for y in range(4):
+                        for z in range(4):
+                            cells = [(x + dx * i, y + dy * i, z + dz * i) for i in range(4)]
+                            if all(0 <= cx < 4 and 0 <= cy < 4 and 0 <= cz < 4 for cx, cy, cz in cells):
+                                lines.append(tuple(cells))
+    return lines
+
+
+LINES = build_lines()
+
+
+def is_win(board, player) -> bool:
+    """player の石が4つ並んでいるか"""
+    return any(all(board[z][y][x] == player for x, y, z in line) for line in LINES)
+
+
+def legal_columns(board):
+    """石を置ける列 (x, y) を左上から順に列挙"""
+    return [(x, y) for y in range(4) for x in range(4) if board[3][y][x] == 0]
+
+
+def forced_move(board):
+    """時間切れなどの場合に本番で置かれる手（左上から順に最初の空いている列）"""
+    return legal_columns(board)[0]
+
+
+def resolve_ai(spec: str, directory: str) -> str:
+    """AI の指定をファイルのパスに変換（git のリビジョン指定なら一時ファイルに書き出す）"""
+    if os.path.exists(spec) or ":" not in spec:
+        return spec
+    source = subprocess.run(["git", "show", spec], check=True, capture_output=True).stdout
+    path = os.path.join(directory, spec.replace(":", "_").replace("/", "_").replace("~", "-"))
+    with open(path, "wb") as f:
+        f.write(source)
+    return path
+
+
+def new_ai(path: str, search_time, instrument: bool = False):
+    """local_driver.load_ai で AI を読み込み、指定があれば探索時間を上書きして計測を有効にする"""
+    ai = load_ai(path)
+    if search_time is not None and hasattr(ai, "search_time"):
+        ai.search_time = search_time
+    if instrument and hasattr(ai, "enable_instrumentation"):
+        ai.enable_instrumentation()
+    return ai
+
+
+def add_stats(total, stats) -> None:
+    """入れ子の dict の数値を total に足し込む"""
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            add_stats(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+def merge_report(total, report) -> None:
+    """1手分の search_report から集計に使う値を total に足し込む"""
+    if not report:
+        return
+    add_stats(total, {
+        "moves": 1,
+        **{key: report[key] for key in ("nodes", "cpu_seconds", "cutoffs", "first_move_cutoffs")},
+        "tt": {key: value for key, value in report["tt"].items() if key != "hit_rate"},
+        "time": report["time"],
+    })
+
+
+def play_game(job):
+    """1局を対戦し、結果と各手の思考時間を返す（プロセスプールのワーカーで実行）"""
+    index, paths, a_first, opening_plies, seed, cpu_limit, wall_limit, search_time, instrument = job
+    ais = [new_ai(path, search_time, instrument) for path in paths]  # 0: AI_A, 1: AI_B
+    rng = random.Random(seed + index // 2)  # 先手・後手を入れ替えた2局は同じ序盤
+    board = create_board()
+    last_move = (0, 0, 0)
+    times = ([], [])
+    forced = [0, 0]
+    stats = ({}, {})  # 探索の統計の集計（--instrument のとき）
+    winner = None
+    for ply in range(64):
+        player = 1 if ply % 2 == 0 else 2
+        side = 0 if (player == 1) == a_first else 1
+        if ply < opening_plies:
+            x, y = rng.choice(legal_columns(board))
+        else:
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            try:
+                x, y = ais[side].get_move(board, player, last_move)
+                ok = (x, y) in legal_columns(board)
+            except Exception:
+                ok = False
+            cpu_used = time.process_time() - cpu_start
+            wall_used = time.perf_counter() - wall_start
+            times[side].append(cpu_used)
+            if instrument and hasattr(ais[side], "search_report"):
+                merge_report(stats[side], ais[side].search_report())
+            if not ok or cpu_used > cpu_limit or wall_used > wall_limit:
+                forced[side] += 1
+                x, y = forced_move(board)
+        z = next(z for z in range(4) if board[z][y][x] == 0)
+        place_disk(board, x, y, player)
+        last_move = (x, y, z)
+        if is_win(board, player):
+            winner = side
+            break
+    result = 0.5 if winner is None else (1.0 if winner == 0 else 0.0)
+    return {"index": index, "a_first": a_first, "result": result, "plies": ply + 1,
+            "times": times, "forced": forced, "stats": stats}
+
+
+def score_interval(results):
+    """AI_A のスコア率（勝ち1・引き分け0.5・負け0）とその95%信頼区間（Wilson のスコア区間）
+    
+    全勝・全敗でも区間の幅が0にならず、局数が少ないほど広くなる
+    """
+    n = len(results)
+    score = sum(results) / n
+    z2 = Z_95 * Z_95
+    center = (score + z2 / (2 * n)) / (1 + z2 / n)
+    margin = Z_95 * math.sqrt(score * (1 - score) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+    return score, max(0.0, center - margin), min(1.0, center + margin)
+
+
+def elo(score: float, games: int) -> float:
+    """games 局でのスコア率をレーティング差に変換（全勝・全敗は半局分だけ戻し、有限の値にする）"""
+    limit = 0.5 / games
+    score = min(max(score, limit), 1.0 - limit)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def percentile(values, q: float) -> float:
+    """値の q 分位点（線形補間）"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def report(names, games) -> None:
+    """対戦結果を表示"""
+    results = [game["result"] for game in games]
+    wins = sum(1 for r in results if r == 1.0)
+    draws = sum(1 for r in results if r == 0.5)
+    losses = len(results) - wins - draws
+    n = len(results)
+    score, low, high = score_interval(results)
+    print(f"\n# {names[0]} vs {names[1]}: {n}局")
+    print(f"  {names[0]} の 勝ち {wins} / 引き分け {draws} / 負け {losses}")
+    print(f"  スコア率 {score * 100:.1f}% (95%信頼区間 {low * 100:.1f}% - {high * 100:.1f}%)")
+    print(f"  レーティング差 {elo(score, n):+.0f} (95%信頼区間 {elo(low, n):+.0f} - {elo(high, n):+.0f})")
+    for first in (True, False):
+        subset = [game["result"] for game in games if game["a_first"] == first]
+        if subset:
+            print(f"  {names[0]} が{'先手' if first else '後手'}: スコア率 {sum(subset) / len(subset) * 100:.1f}% ({len(subset)}局)")
+    print(f"  平均手数 {sum(game['plies'] for game in games) / len(games):.1f}")
+    print("  1手あたりのCPU時間（秒）:")
+    for side, name in enumerate(names):
+        values = [t for game in games for t in game["times"][side]]
+        forced = sum(game["forced"][side] for game in games)
+        print(f"    {name}: 中央値 {percentile(values, 0.5):.3f} / 90% {percentile(values, 0.9):.3f} / "
+              f"99% {percentile(values, 0.99):.3f} / 最大 {max(values, default=0.0):.3f}"
+              f"  （時間切れ・反則で置き換えた手 {forced}）")
+    if any(game["stats"][side] for game in games for side in (0, 1)):
+        print("  探索の統計（計測ありの手の合計）:")
+        for side, name in enumerate(names):
+            total = {}
+            for game in games:
+                add_stats(total, game["stats"][side])
+            if not total:
+                print(f"    {name}: 計測に対応していません")
+                continue
+            tt, times = total["tt"], total["time"]
+            time_total = sum(times.values()) or 1.0
+            shares = " / ".join(f"{category} {seconds / time_total * 100:.0f}%" for category, seconds in times.items())
+            print(f"    {name}: {total['moves']}手, {total['nodes'] / max(total['cpu_seconds'], 1e-9):.0f} ノード/秒, "
+                  f"置換表ヒット率 {tt['hits'] / max(tt['probes'], 1) * 100:.1f}%, "
+                  f"初手カット率 {total['first_move_cutoffs'] / max(total['cutoffs'], 1) * 100:.1f}%")
+            print(f"      時間 {shares}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="2つのAIを対戦させる")
+    parser.add_argument("ai_a", help="AI_A のファイルまたは git のリビジョン指定（例: main.py）")
+    parser.add_argument("ai_b", help="AI_B のファイルまたは git のリビジョン指定（例: HEAD~1:main.py）")
+    parser.add_argument("--games", type=int, default=20, help="対局数（先手・後手を入れ替えるため偶数に切り上げる）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="並列に対局するプロセス数")
+    parser.add_argument("--cpu-limit", type=float, default=3.0, help="1手あたりのCPU時間の上限（秒）")
+    parser.add_argument("--wall-limit", type=float, default=10.0, help="1手あたりの経過時間の上限（秒）")
+    parser.add_argument("--search-time", type=float, default=None, help="両方のAIの search_time を上書きする（秒）")
+    parser.add_argument("--opening-plies", type=int, default=2, help="序盤にランダムに置く手数")
+    parser.add_argument("--seed", type=int, default=0, help="序盤の乱数のシード")
+    parser.add_argument("--instrument", action="store_true",
+                        help="探索の統計を集計する（計測の分だけ遅くなるため、強さの比較には使わない）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = (resolve_ai(args.ai_a, directory), resolve_ai(args.ai_b, directory))
+        pairs = (args.games + 1) // 2
+        jobs = [(i, paths, i % 2 == 0, args.opening_plies, args.seed, args.cpu_limit, args.wall_limit, args.search_time,
+                 args.instrument)
+                for i in range(pairs * 2)]
+        games = []
+        start = time.time()
+        with multiprocessing.Pool(max(1, args.workers)) as pool:
+            for game in pool.imap_unordered(play_game, jobs):
+                games.append(game)
+                mark = {1.0: "A", 0.5: "=", 0.0: "B"}[game["result"]]
+                print(f"  {len(games)}/{len(jobs)} 局目: {mark} ({game['plies']}手, {time.time() - start:.0f}秒)", flush=True)
+        games.sort(key=lambda game: game["index"])
+        report((args.ai_a, args.ai_b), games)
+
+
+if __name__ == "__main__":
+    main()